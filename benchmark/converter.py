@@ -0,0 +1,50 @@
+"""Converter 解析耗时基准测试
+
+用法：python -m benchmark.converter [已保存的作品页面 HTML 文件 ...]
+未指定页面文件时使用 benchmark.fixtures 生成的模拟页面。
+"""
+from argparse import ArgumentParser
+from pathlib import Path
+from timeit import repeat
+
+from source.expansion import Converter
+from .fixtures import generate_note
+from .fixtures import generate_page
+from .fixtures import generate_state
+
+__all__ = ["main"]
+
+
+def load_pages(paths: list[str]) -> dict[str, str]:
+    if paths:
+        return {Path(i).name: Path(i).read_text(encoding="utf-8") for i in paths}
+    return {
+        "image_1": generate_page(generate_state(generate_note("65f000000000000000000001", 1, seed=1))),
+        "image_18": generate_page(generate_state(generate_note("65f000000000000000000018", 18, seed=18))),
+        "video": generate_page(generate_state(generate_note("65f0000000000000000000ff", video=True, seed=255))),
+    }
+
+
+def measure(function, page: str, number: int) -> float:
+    return min(repeat(lambda: function(page), number=number, repeat=5)) / number
+
+
+def main():
+    parser = ArgumentParser(description="Converter 解析耗时基准测试")
+    parser.add_argument("pages", nargs="*", help="已保存的作品页面 HTML 文件")
+    parser.add_argument("-n", "--number", type=int, default=20, help="每轮调用次数")
+    args = parser.parse_args()
+    converter = Converter()
+    fallback = Converter()
+    # 关闭快速解析，测量 lxml + YAML 解析路径
+    fallback.fast_convert = lambda _: {}
+    print(f"{'page':<40}{'size KB':>10}{'lxml+yaml ms':>15}{'json ms':>10}{'speedup':>10}")
+    for name, page in load_pages(args.pages).items():
+        slow = measure(fallback.run, page, args.number)
+        fast = measure(converter.run, page, args.number)
+        same = "" if converter.run(page) == fallback.run(page) else "  (结果不一致)"
+        print(f"{name:<40}{len(page) / 1024:>10.1f}{slow * 1000:>15.2f}{fast * 1000:>10.2f}{slow / fast:>9.1f}x{same}")
+
+
+if __name__ == "__main__":
+    main()
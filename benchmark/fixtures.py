@@ -0,0 +1,119 @@
+from json import dumps
+from random import Random
+
+__all__ = ["generate_note", "generate_state", "generate_page", ]
+
+PAGE = (
+    "<!doctype html><html><head><meta charset=\"utf-8\"><title>{title} - 小红书</title>"
+    "<script>window.__SETUP_SERVER_STATE__={{\"__PAGE_NAME__\":\"explore\"}}</script>"
+    "</head><body><div id=\"app\">{body}</div>"
+    "<script src=\"https://fe-static.xhscdn.com/formula-static/xhs-pc-web/public/resource/js/main.js\"></script>"
+    "<script>window.__INITIAL_STATE__={state}</script></body></html>")
+
+
+def generate_note(note_id: str, images: int = 0, video: bool = False, seed: int = 0, ) -> dict:
+    """生成与作品页面 __INITIAL_STATE__ 结构一致的作品数据"""
+    random = Random(seed)
+
+    def token() -> str:
+        return f"1040g{random.getrandbits(120):030x}"
+
+    note = {
+        "noteId": note_id,
+        "type": "video" if video else "normal",
+        "title": f"测试作品 {note_id[-6:]}",
+        "desc": "#测试[话题]# " * random.randint(1, 20),
+        "user": {
+            "userId": f"{random.getrandbits(96):024x}",
+            "nickname": "测试用户",
+            "avatar": f"https://sns-avatar-qc.xhscdn.com/avatar/{token()}",
+        },
+        "imageList": [
+            {
+                "urlDefault": f"http://sns-webpic-qc.xhscdn.com/202403121710/{random.getrandbits(128):032x}/"
+                              f"{token()}!nd_dft_wlteh_webp_3",
+                "urlPre": f"http://sns-webpic-qc.xhscdn.com/202403121710/{random.getrandbits(128):032x}/"
+                          f"{token()}!nd_prv_wlteh_webp_3",
+                "width": 1080,
+                "height": 1440,
+                "livePhoto": False,
+                "fileId": "",
+                "traceId": "",
+                "infoList": [
+                    {"imageScene": "WB_PRV", "url": f"http://sns-webpic-qc.xhscdn.com/{token()}"},
+                    {"imageScene": "WB_DFT", "url": f"http://sns-webpic-qc.xhscdn.com/{token()}"},
+                ],
+                "stream": {},
+            } for _ in range(images)],
+        "tagList": [
+            {"id": f"{random.getrandbits(96):024x}", "name": f"标签{i}", "type": "topic"}
+            for i in range(random.randint(0, 10))],
+        "interactInfo": {
+            "followed": False,
+            "relation": "none",
+            "liked": False,
+            "likedCount": str(random.randint(0, 10000)),
+            "collected": False,
+            "collectedCount": str(random.randint(0, 10000)),
+            "commentCount": str(random.randint(0, 1000)),
+            "shareCount": str(random.randint(0, 1000)),
+        },
+        "time": 1700000000000 + random.randint(0, 10 ** 10),
+        "lastUpdateTime": 1700000000000 + random.randint(0, 10 ** 10),
+        "ipLocation": "上海",
+        "atUserList": [],
+        "shareInfo": {"unShare": False},
+    }
+    if video:
+        note["video"] = {
+            "consumer": {"originVideoKey": f"pre_post/{token()}"},
+            "media": {
+                "videoId": random.getrandbits(60),
+                "stream": {
+                    "h264": [{"masterUrl": f"http://sns-video-bd.xhscdn.com/stream/110/259/{token()}_259.mp4",
+                              "backupUrls": [], "size": random.randint(10 ** 6, 10 ** 8)}],
+                    "h265": [],
+                    "av1": [],
+                },
+            },
+        }
+    return note
+
+
+def generate_state(note: dict, padding: int = 30, seed: int = 0) -> dict:
+    """按照作品页面的结构包装作品数据，padding 控制附带的推荐作品数量以模拟真实页面体积"""
+    return {
+        "global": {"appSettings": {"notificationInterval": 30, "prohibitedEmoji": {"weiboEmojis": []}},
+                   "serverTime": 1700000000000, "easyAccessModalVisible": {"addToHomeScreen": False}},
+        "user": {"loggedIn": False, "activated": False, "userInfo": {"user_id": "", "nickname": ""},
+                 "follow": [], "userPageData": {}, "activeTab": {}, "notes": [[], [], [], []]},
+        "feed": {"query": {"cursor_score": "", "num": 31, "refresh_type": 1},
+                 "feeds": [generate_note(f"{seed:08x}{i:016x}", 3, seed=seed * 1000 + i) for i in range(padding)],
+                 "currentChannel": "homefeed_recommend", "unreadInfo": {}},
+        "note": {
+            "prevRouteData": {},
+            "prevRoute": "Empty",
+            "commentTarget": {},
+            "isImgFullscreen": False,
+            "gotoPage": "",
+            "firstNoteId": note["noteId"],
+            "noteDetailMap": {
+                note["noteId"]: {
+                    "comments": {"list": [], "cursor": "", "hasMore": True, "loading": False, "firstRequestFinish": False},
+                    "currentTime": None,
+                    "note": note,
+                },
+            },
+            "serverRequestInfo": {"state": "success", "errorCode": 0, "errMsg": ""},
+            "volume": 0,
+            "mediaWidth": 0,
+            "noteHeight": 0,
+        },
+    }
+
+
+def generate_page(state: dict, title: str = "") -> str:
+    """生成作品页面 HTML，与真实页面一致地使用 \\u002F 转义斜杠并包含 undefined 值"""
+    text = dumps(state, ensure_ascii=False, separators=(",", ":"))
+    text = text.replace("/", "\\u002F").replace(":null", ":undefined")
+    return PAGE.format(title=title, body="<div class=\"note-container\"></div>" * 50, state=text)
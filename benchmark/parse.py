@@ -0,0 +1,144 @@
+"""作品数据解析与提取的 CPU 微基准测试
+
+用法：python -m benchmark.parse [-c 页面文件夹] [-n 调用次数] [--save 基准文件] [--compare 基准文件]
+依次测量 Converter.run、Namespace 构造、Explore.run、Image.get_image_link 与 Video.get_video_link
+在每个页面上的单次调用耗时与 tracemalloc 统计的内存分配；
+未指定页面文件夹时使用 benchmark.fixtures 生成的模拟页面，包含 1 至 18 张图片的图文作品、视频作品与异常页面。
+"""
+from argparse import ArgumentParser
+from json import dump
+from json import load
+from pathlib import Path
+from sys import exit
+from timeit import repeat
+from tracemalloc import get_traced_memory
+from tracemalloc import reset_peak
+from tracemalloc import start
+from tracemalloc import stop
+
+from source.application.explore import Explore
+from source.application.image import Image
+from source.application.video import Video
+from source.expansion import Converter
+from source.expansion import Namespace
+from .fixtures import generate_note
+from .fixtures import generate_page
+from .fixtures import generate_state
+
+__all__ = ["main"]
+
+
+def generate_corpus() -> dict[str, str]:
+    corpus = {
+        f"image_{i}": generate_page(generate_state(generate_note(f"65f{i:021x}", i, seed=i), seed=i))
+        for i in (1, 2, 4, 9, 18)}
+    corpus["video"] = generate_page(generate_state(generate_note(f"65f{255:021x}", video=True, seed=255), seed=255))
+    page = corpus["image_4"]
+    # 异常页面：内容被截断、缺少作品数据、作品数据不是合法 JSON
+    corpus["truncated"] = page[:len(page) // 2]
+    corpus["no_state"] = page.replace("window.__INITIAL_STATE__", "window.__OTHER_STATE__")
+    corpus["invalid_json"] = page.replace("\"noteDetailMap\":{", "\"noteDetailMap\":{,", 1)
+    return corpus
+
+
+def load_corpus(folder: str) -> dict[str, str]:
+    if folder:
+        return {i.stem: i.read_text(encoding="utf-8") for i in sorted(Path(folder).glob("*.html"))}
+    return generate_corpus()
+
+
+def prepare(page: str) -> tuple[dict, Namespace]:
+    data = safe_call(Converter().run, page) or {}
+    return data, Namespace(data)
+
+
+def safe_call(function, *args):
+    """异常页面可能导致解析抛出异常，基准测试只关注耗时"""
+    try:
+        return function(*args)
+    except Exception:
+        return None
+
+
+def targets(page: str) -> dict:
+    converter, explore = Converter(), Explore()
+    data, namespace = prepare(page)
+    return {
+        "Converter.run": lambda: safe_call(converter.run, page),
+        "Namespace": lambda: Namespace(data),
+        "Explore.run": lambda: explore.run(namespace),
+        "Image.get_image_link": lambda: Image.get_image_link(namespace, "png"),
+        "Video.get_video_link": lambda: Video.get_video_link(namespace),
+    }
+
+
+def measure_time(function, number: int) -> float:
+    return min(repeat(function, number=number, repeat=5)) / number
+
+
+def measure_memory(function) -> tuple[int, int]:
+    """返回单次调用的内存峰值增量与调用结束后仍占用的内存增量，单位：字节"""
+    start()
+    try:
+        reset_peak()
+        before = get_traced_memory()[0]
+        result = function()
+        current, peak = get_traced_memory()
+        del result
+    finally:
+        stop()
+    return peak - before, current - before
+
+
+def run(corpus: dict[str, str], number: int) -> dict[str, dict]:
+    results = {}
+    for page_name, page in corpus.items():
+        for target, function in targets(page).items():
+            peak, retained = measure_memory(function)
+            results[f"{target}/{page_name}"] = {
+                "time": measure_time(function, number),
+                "peak": peak,
+                "retained": retained,
+            }
+    return results
+
+
+def report(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> bool:
+    """输出测试结果，存在超过 threshold 的耗时回退时返回 True"""
+    regression = False
+    print(f"{'target/page':<44}{'us/call':>12}{'peak KB':>10}{'kept KB':>10}{'baseline':>10}")
+    for key, value in results.items():
+        line = (f"{key:<44}{value['time'] * 1e6:>12.1f}{value['peak'] / 1024:>10.1f}"
+                f"{value['retained'] / 1024:>10.1f}")
+        if old := baseline.get(key):
+            ratio = value["time"] / old["time"] if old["time"] else 1
+            line += f"{ratio:>9.2f}x"
+            if ratio > 1 + threshold:
+                regression = True
+                line += "  回退"
+        print(line)
+    return regression
+
+
+def main():
+    parser = ArgumentParser(description="作品数据解析与提取的 CPU 微基准测试")
+    parser.add_argument("-c", "--corpus", default="", help="已保存的作品页面 HTML 文件夹")
+    parser.add_argument("-n", "--number", type=int, default=50, help="每轮调用次数")
+    parser.add_argument("--save", default="", help="将本次结果保存为基准文件")
+    parser.add_argument("--compare", default="", help="与基准文件比较")
+    parser.add_argument("--threshold", type=float, default=0.1, help="判定耗时回退的比例")
+    args = parser.parse_args()
+    results = run(load_corpus(args.corpus), args.number)
+    baseline = {}
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = load(f)
+    regression = report(results, baseline, args.threshold)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            dump(results, f, indent=4)
+    exit(1 if regression else 0)
+
+
+if __name__ == "__main__":
+    main()
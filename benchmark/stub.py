@@ -0,0 +1,102 @@
+"""模拟小红书作品页面与图片、视频 CDN 的本地服务器
+
+全部域名经 StubResolver 解析至本机端口，服务器按请求的 Host 返回作品页面或指定大小的媒体数据；
+程序使用 https 链接，服务器使用 openssl 临时生成的自签名证书。
+"""
+from asyncio import sleep
+from hashlib import md5
+from pathlib import Path
+from socket import AF_INET
+from socket import AI_NUMERICHOST
+from ssl import PROTOCOL_TLS_SERVER
+from ssl import SSLContext
+from subprocess import DEVNULL
+from subprocess import run
+
+from aiohttp import web
+from aiohttp.abc import AbstractResolver
+
+from .fixtures import generate_note
+from .fixtures import generate_page
+from .fixtures import generate_state
+
+__all__ = ["StubResolver", "create_ssl_context", "create_app", "note_id", ]
+
+PLACEHOLDER = "f" * 24
+
+
+class StubResolver(AbstractResolver):
+    """将任意域名解析至本机的模拟服务器"""
+
+    def __init__(self, port: int):
+        self.port = port
+
+    async def resolve(self, host: str, port: int = 0, family=AF_INET) -> list[dict]:
+        return [{
+            "hostname": host,
+            "host": "127.0.0.1",
+            "port": self.port,
+            "family": AF_INET,
+            "proto": 0,
+            "flags": AI_NUMERICHOST,
+        }]
+
+    async def close(self) -> None:
+        pass
+
+
+def create_ssl_context(folder: Path) -> SSLContext:
+    key, cert = folder.joinpath("stub.key"), folder.joinpath("stub.crt")
+    run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", str(key), "-out", str(cert), ],
+        check=True, stdout=DEVNULL, stderr=DEVNULL, )
+    context = SSLContext(PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def note_id(index: int, prefix: str = "") -> str:
+    """生成 24 位作品 ID；服务器根据作品 ID 的序号决定作品类型，无需保存作品状态"""
+    return f"{prefix[:8]:0>8}{index:016x}"
+
+
+def create_app(
+        images: int = 3,
+        video_ratio: float = 0.1,
+        image_size: int = 64 * 1024,
+        video_size: int = 4 * 1024 * 1024,
+        latency: float = 0.0,
+        padding: int = 30,
+) -> web.Application:
+    """images 为每个图文作品的图片数量，video_ratio 为视频作品占比，latency 为每次响应前的等待秒数"""
+    # 预先生成图文与视频页面模板，响应时仅替换作品 ID，服务器内存占用与作品数量无关
+    pages = {
+        video: generate_page(generate_state(
+            generate_note(PLACEHOLDER, 0 if video else images, video, int(video)), padding, int(video)))
+        for video in (False, True)}
+    blobs = {"image": bytes(image_size), "video": bytes(video_size)}
+    video_every = round(1 / video_ratio) if video_ratio > 0 else 0
+
+    def page(id_: str) -> str:
+        video = bool(video_every) and int(id_[-16:], 16) % video_every == video_every - 1
+        return pages[video].replace(PLACEHOLDER, id_)
+
+    async def handle(request: web.Request) -> web.StreamResponse:
+        if latency:
+            await sleep(latency)
+        if request.host.startswith("www.xiaohongshu.com"):
+            if not request.path.startswith("/explore/"):
+                return web.Response(status=404)
+            return web.Response(text=page(request.path.rsplit("/", 1)[-1]), content_type="text/html")
+        type_ = "video" if "video" in request.host else "image"
+        etag = f'"{md5(request.path.encode()).hexdigest()}"'
+        return web.Response(
+            body=blobs[type_],
+            headers={
+                "ETag": etag,
+                "Content-Type": "video/mp4" if type_ == "video" else "image/png",
+            }, )
+
+    app = web.Application()
+    app.router.add_route("GET", "/{tail:.*}", handle)
+    return app
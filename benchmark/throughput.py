@@ -0,0 +1,192 @@
+"""端到端吞吐量基准测试
+
+用法：python -m benchmark.throughput [-b 1 10 100 1000 10000] [-c 并发数] [--latency 秒] ...
+启动本地模拟服务器（benchmark.stub），将 XHS 的全部请求指向该服务器，
+按批次下载作品并统计每秒作品数、下载速度、作品耗时 P50 / P99、内存峰值与新建、复用的连接数量。
+每个批次在独立的子进程中运行，内存峰值互不影响；下载的文件在批次结束后删除。
+"""
+from argparse import ArgumentParser
+from asyncio import Semaphore
+from asyncio import gather
+from asyncio import run
+from multiprocessing import get_context
+from pathlib import Path
+from resource import RUSAGE_SELF
+from resource import getrusage
+from secrets import token_hex
+from socket import create_connection
+from statistics import quantiles
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from time import sleep
+
+from aiohttp import ClientSession
+from aiohttp import TCPConnector
+from aiohttp import web
+
+from .stub import StubResolver
+from .stub import create_app
+from .stub import create_ssl_context
+from .stub import note_id
+
+__all__ = ["main"]
+
+
+class Silent:
+    """替代 TUI 日志组件，丢弃程序输出"""
+
+    @staticmethod
+    def write(_):
+        pass
+
+
+def serve(port, options: dict, folder: str):
+    web.run_app(
+        create_app(**options),
+        host="127.0.0.1",
+        port=port,
+        ssl_context=create_ssl_context(Path(folder)),
+        print=None,
+        handle_signals=False, )
+
+
+async def redirect_sessions(xhs, port: int) -> None:
+    """使用解析至模拟服务器的连接池替换 XHS 的连接池，保留连接池设置与连接统计"""
+    manager = xhs.manager
+    connector = TCPConnector(
+        resolver=StubResolver(port),
+        ssl=False,
+        limit=manager.connector.limit,
+        limit_per_host=manager.connector.limit_per_host, )
+    for name, owner in (("request_session", xhs.html), ("download_session", xhs.download)):
+        session = getattr(manager, name)
+        replacement = ClientSession(
+            connector=connector,
+            connector_owner=False,
+            headers=session.headers,
+            timeout=session.timeout,
+            trace_configs=session.trace_configs, )
+        await session.close()
+        setattr(manager, name, replacement)
+        owner.session = replacement
+    await manager.connector.close()
+    manager.connector = connector
+
+
+def unlimit(xhs) -> None:
+    """关闭自适应限速，测量程序本身的处理能力"""
+    for bucket in xhs.limiter.buckets.values():
+        bucket.rate = bucket.maximum = bucket.burst = bucket.tokens = float("inf")
+
+
+def run_batch(size: int, port: int, concurrency: int, limit: bool) -> dict:
+    from source import XHS
+
+    with TemporaryDirectory() as folder:
+        return run(_run_batch(XHS, size, port, concurrency, limit, Path(folder)))
+
+
+async def _run_batch(cls, size: int, port: int, concurrency: int, limit: bool, folder: Path) -> dict:
+    prefix = token_hex(4)
+    xhs = cls(work_path=str(folder), cookie="", concurrency=concurrency, max_retry=0)
+    await redirect_sessions(xhs, port)
+    xhs.recorder.file = folder.joinpath("benchmark.db")
+    xhs.link_cache.file = folder.joinpath("benchmark.db")
+    if not limit:
+        unlimit(xhs)
+    latencies, failures = [], 0
+    semaphore = Semaphore(concurrency)
+    log = Silent()
+
+    async def deal(index: int):
+        nonlocal failures
+        url = f"https://www.xiaohongshu.com/explore/{note_id(index, prefix)}"
+        async with semaphore:
+            start = perf_counter()
+            result = await xhs.extract(url, download=True, log=log, concurrency=1)
+            latencies.append(perf_counter() - start)
+        failures += not (result and result[0])
+
+    async with xhs:
+        start = perf_counter()
+        await gather(*(deal(i) for i in range(size)))
+        elapsed = perf_counter() - start
+        downloaded = sum(xhs.manager.metrics.counters["download_bytes_total"].values())
+        connections = {dict(k)["state"]: v for k, v in xhs.manager.metrics.counters["connections_total"].items()}
+    return {
+        "size": size,
+        "time": elapsed,
+        "failures": failures,
+        "bytes": downloaded,
+        "latencies": latencies,
+        "new": connections.get("new", 0),
+        "reused": connections.get("reused", 0),
+        # Linux 中 ru_maxrss 单位为 KB
+        "rss": getrusage(RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def percentile(values: list[float], n: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0
+    return quantiles(values, n=100, method="inclusive")[n - 1]
+
+
+def report(result: dict) -> str:
+    latencies = result["latencies"]
+    return (f"{result['size']:>8}{result['time']:>10.2f}{result['size'] / result['time']:>10.1f}"
+            f"{result['bytes'] / result['time'] / 1024 / 1024:>10.1f}"
+            f"{percentile(latencies, 50) * 1000:>10.1f}{percentile(latencies, 99) * 1000:>10.1f}"
+            f"{result['failures']:>10}{result['rss'] / 1024 / 1024:>10.1f}"
+            f"{result['new']:>8.0f}{result['reused']:>8.0f}")
+
+
+def wait_server(port: int, timeout: float = 30) -> None:
+    deadline = perf_counter() + timeout
+    while True:
+        try:
+            create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if perf_counter() > deadline:
+                raise
+            sleep(0.1)
+
+
+def main():
+    parser = ArgumentParser(description="端到端吞吐量基准测试")
+    parser.add_argument("-b", "--batches", type=int, nargs="+", default=[1, 10, 100, 1000], help="每批作品数量")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="同时处理的作品数量")
+    parser.add_argument("-p", "--port", type=int, default=18443, help="模拟服务器端口")
+    parser.add_argument("--images", type=int, default=3, help="每个图文作品的图片数量")
+    parser.add_argument("--video-ratio", type=float, default=0.1, help="视频作品占比")
+    parser.add_argument("--image-size", type=int, default=64, help="图片大小，单位：KB")
+    parser.add_argument("--video-size", type=int, default=4096, help="视频大小，单位：KB")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟服务器响应延迟，单位：秒")
+    parser.add_argument("--limit", action="store_true", help="保留自适应限速")
+    args = parser.parse_args()
+    context = get_context("spawn")
+    options = {
+        "images": args.images,
+        "video_ratio": args.video_ratio,
+        "image_size": args.image_size * 1024,
+        "video_size": args.video_size * 1024,
+        "latency": args.latency,
+    }
+    with TemporaryDirectory() as folder:
+        server = context.Process(target=serve, args=(args.port, options, folder), daemon=True)
+        server.start()
+        try:
+            wait_server(args.port)
+            print(f"{'notes':>8}{'time s':>10}{'notes/s':>10}{'MB/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+                  f"{'failures':>10}{'RSS MB':>10}{'new':>8}{'reused':>8}")
+            with context.Pool(1, maxtasksperchild=1) as pool:
+                for size in args.batches:
+                    print(report(pool.apply(run_batch, (size, args.port, args.concurrency, args.limit))))
+        finally:
+            server.terminate()
+            server.join()
+
+
+if __name__ == "__main__":
+    main()
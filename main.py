@@ -5,6 +5,10 @@ from sys import argv
 from source import XHS
 from source import XHSDownloader
 from source import cli
+from source import serve
+from source import worker
+from source.module import ROOT
+from source.module import Settings
 
 
 async def example():
@@ -40,13 +44,13 @@ async def example():
                    folder_mode=folder_mode,
                    ) as xhs:  # 使用自定义参数
         download = True  # 是否下载作品文件，默认值：False
-        efficient = True  # 高效模式，禁用请求延时
+        # 请求间隔由自适应限速器控制，efficient 参数已弃用
         # 返回作品详细信息，包括下载地址
         # 获取数据失败时返回空字典
-        print(await xhs.extract(error_link, download, efficient=efficient))
-        print(await xhs.extract(demo_link, download, efficient=efficient))
+        print(await xhs.extract(error_link, download))
+        print(await xhs.extract(demo_link, download))
         # 支持传入多个作品链接
-        print(await xhs.extract(multiple_links, download, efficient=efficient))
+        print(await xhs.extract(multiple_links, download))
         # 按照文件的方式传输地址
         file_path = '/Users/slyrx/Desktop/test_XHS.txt'
         i = 0
@@ -56,16 +60,23 @@ async def example():
                 if i == 100:
                     time.sleep(30)
                 i = i+1
-                print(await xhs.extract(line, download, efficient=efficient))
+                print(await xhs.extract(line, download))
 
 
 async def main():
+    if Settings(ROOT).run()["server"]:
+        await serve()
+        return
     async with XHSDownloader() as xhs:
         await xhs.run_async()
 
 
 if __name__ == '__main__':
-    if len(argv) > 1:
+    if len(argv) > 1 and argv[1] == "server":
+        run(serve())
+    elif len(argv) > 1 and argv[1] == "worker":
+        worker.main(argv[2:], prog_name=f"{argv[0]} worker")
+    elif len(argv) > 1:
         cli()
     else:
         run(main())
@@ -1,3 +1,4 @@
 from .main import cli
+from .worker import worker
 
-__all__ = ["cli"]
+__all__ = ["cli", "worker"]
@@ -10,6 +10,7 @@ from click import (
     pass_context,
     Context,
     echo,
+    File,
 )
 
 from source.application import XHS
@@ -27,6 +28,7 @@ class CLI:
     def __init__(self, ctx: Context, **kwargs):
         self.ctx = ctx
         self.url = kwargs.pop("url")
+        self.input_file = kwargs.pop("input_file")
         self.index = self.__format_index(kwargs.pop("index"))
         self.path = kwargs.pop("settings")
         self.update = kwargs.pop("update_settings")
@@ -42,10 +44,13 @@ class CLI:
         await self.APP.__aexit__(exc_type, exc_value, traceback)
 
     async def run(self):
-        if not self.url:
+        if self.input_file:
+            await self.APP.extract_stream(self.input_file, index=self.index)
+        elif self.url:
+            await self.APP.extract_cli(self.url, index=self.index)
+        else:
             echo("No URL specified")
             self.ctx.exit()
-        await self.APP.extract_cli(self.url, index=self.index)
         self.__update_settings()
 
     def __update_settings(self):
@@ -83,6 +88,11 @@ class CLI:
 
 @command(name="XHS-Downloader", help=PROJECT)
 @option("--url", "-u", type=str, help="小红书作品链接", )
+@option("--input_file",
+        "--input-file",
+        "-f",
+        type=File("r", encoding="utf-8"),
+        help="从文本文件逐行读取小红书作品链接，传入 - 表示从标准输入读取", )
 @option("--index", "-i", type=str, help="下载指定序号的图片文件，仅对图文作品生效", )
 @option("--work_path",
         "-wp",
@@ -100,6 +110,7 @@ class CLI:
 @option("--image_format", "-if", type=Choice(["png", "PNG", "webp", "WEBP"]),
         help="图文作品文件下载格式，支持：PNG、WEBP", )
 @option("--folder_mode", "-fm", type=bool, help="是否将每个作品的文件储存至单独的文件夹", )
+@option("--concurrency", "-cc", type=int, help="同时处理的作品数量", )
 @option("--language", "-l",
         type=Choice(["zh-CN", "en-GB"]), help="设置程序语言，目前支持：zh-CN、en-GB", )
 @option("--settings", "-s", type=Path(dir_okay=False), help="读取指定配置文件", )
@@ -0,0 +1,121 @@
+from asyncio import CancelledError
+from asyncio import create_task
+from asyncio import gather
+from asyncio import run
+from asyncio import sleep
+from multiprocessing import get_context
+from os import getpid
+from socket import gethostname
+
+from click import (
+    command,
+    option,
+    File,
+    echo,
+)
+
+from source.application import XHS
+from source.module import (
+    ROOT,
+    ERROR,
+)
+from source.module import JobQueue
+from source.module import Settings
+from source.module import logging
+
+__all__ = ["worker", "Worker"]
+
+
+class Worker:
+    """从数据库任务队列领取作品并处理，多个进程可同时运行
+
+    每个进程同时处理 XHS.concurrency 个作品；下载记录实时读写数据库，下载前在数据库中占用作品 ID，
+    避免不同进程重复下载同一作品。"""
+    POLL = 2
+    LINK = "https://www.xiaohongshu.com/explore/{}"
+
+    def __init__(self, settings: dict):
+        self.APP = XHS(**settings)
+        self.APP.recorder.shared = True
+        self.queue = JobQueue(self.APP.manager)
+        self.name = f"{gethostname()}-{getpid()}"
+        self.running: set[int] = set()
+
+    async def __aenter__(self):
+        await self.APP.__aenter__()
+        await self.queue.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.queue.__aexit__(exc_type, exc_value, traceback)
+        await self.APP.__aexit__(exc_type, exc_value, traceback)
+
+    async def run(self, wait=False) -> None:
+        """处理任务直到队列中没有等待或正在处理的任务；wait 为真时持续等待新任务"""
+        heartbeat = create_task(self.__heartbeat())
+        try:
+            await gather(*(self.__work(wait) for _ in range(self.APP.concurrency)))
+        finally:
+            heartbeat.cancel()
+            try:
+                await heartbeat
+            except CancelledError:
+                pass
+
+    async def __work(self, wait: bool) -> None:
+        while True:
+            if not (jobs := await self.queue.claim(self.name)):
+                count = await self.queue.count()
+                if not wait and not count[JobQueue.QUEUED] and not count[JobQueue.RUNNING]:
+                    return
+                await sleep(self.POLL)
+                continue
+            id_, note, download = jobs[0]
+            self.running.add(id_)
+            try:
+                result = await self.APP.extract(self.LINK.format(note), download, concurrency=1)
+            except Exception as error:
+                logging(None, str(error), ERROR)
+                result = []
+            finally:
+                self.running.discard(id_)
+            await self.queue.complete(self.name, id_, bool(result and result[0]))
+
+    async def __heartbeat(self) -> None:
+        while True:
+            await sleep(self.queue.lease / 3)
+            await self.queue.heartbeat(self.name, tuple(self.running))
+
+
+def run_worker(settings: dict, wait: bool) -> None:
+    async def main():
+        async with Worker(settings) as xhs:
+            await xhs.run(wait)
+
+    run(main())
+
+
+async def enqueue(settings: dict, text: str) -> str:
+    """解析文本中的作品链接，以作品 ID 加入任务队列；不同链接指向同一作品时只添加一次"""
+    async with XHS(**settings) as xhs, JobQueue(xhs.manager) as queue:
+        return xhs.prompt.jobs_queued(await queue.add(await xhs.extract_ids(text)))
+
+
+@command(name="worker", help="从数据库任务队列领取作品链接，使用多个进程同时处理")
+@option("--processes", "-p", type=int, default=1, help="工作进程数量", )
+@option("--input_file",
+        "--input-file",
+        "-f",
+        type=File("r", encoding="utf-8"),
+        help="将文本文件中的作品链接加入任务队列，传入 - 表示从标准输入读取", )
+@option("--wait", "-w", is_flag=True, help="任务队列为空时继续等待新任务", )
+def worker(processes: int, input_file, wait: bool):
+    settings = Settings(ROOT).run()
+    if input_file:
+        echo(run(enqueue(settings, input_file.read())))
+    context = get_context("spawn")
+    workers = [context.Process(target=run_worker, args=(settings, wait)) for _ in range(max(processes, 1))]
+    for i in workers:
+        i.start()
+    for i in workers:
+        i.join()
@@ -1,3 +1,5 @@
 from .app import XHSDownloader
+from .server import Server
+from .server import serve
 
-__all__ = ['XHSDownloader']
+__all__ = ['XHSDownloader', 'Server', 'serve']
@@ -77,8 +77,7 @@ class XHSDownloader(App):
 
     async def refresh_screen(self):
         self.pop_screen()
-        await self.APP.recorder.database.close()
-        await self.APP.close()
+        await self.APP.__aexit__(None, None, None)
         self.__initialization()
         await self.__aenter__()
         self.uninstall_screen("index")
@@ -0,0 +1,201 @@
+from asyncio import CancelledError
+from asyncio import Event
+from asyncio import Queue
+from asyncio import Task
+from asyncio import create_task
+from asyncio import current_task
+from functools import partial
+from json import JSONDecodeError
+from json import dumps
+from time import time
+from uuid import uuid4
+
+from aiohttp import web
+
+from source.application import XHS
+from source.module import ERROR
+from source.module import ROOT
+from source.module import Settings
+from source.module import logging
+
+__all__ = ["Server", "Job", "serve", ]
+
+
+class Job:
+    """一次提交的作品链接批量任务，每个链接的处理结果按提交顺序保存"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    FINISHED = "finished"
+    CANCELLED = "cancelled"
+
+    def __init__(self, urls: list[str], download: bool, index: list | None):
+        self.id = uuid4().hex
+        self.urls = urls
+        self.download = download
+        self.index = index
+        self.status = self.QUEUED
+        self.results: list[dict | None] = [None] * len(urls)
+        self.pending = len(urls)
+        self.created = time()
+        self.finished = 0.0
+        self.tasks: set[Task] = set()
+
+    def done(self, i: int, result: dict) -> None:
+        self.results[i] = result
+        self.pending -= 1
+        if not self.pending and self.status != self.CANCELLED:
+            self.status = self.FINISHED
+            self.finished = time()
+
+    def cancel(self) -> None:
+        if self.status in {self.FINISHED, self.CANCELLED}:
+            return
+        self.status = self.CANCELLED
+        self.finished = time()
+        for task in self.tasks:
+            task.cancel()
+
+    def summary(self) -> dict:
+        results = [i for i in self.results if i]
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total": len(self.urls),
+            "success": sum(i["status"] == "success" for i in results),
+            "failure": sum(i["status"] == "failure" for i in results),
+            "pending": self.pending,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+    def json(self) -> dict:
+        return self.summary() | {
+            "results": [i or {"url": u, "status": self.status, "data": {}}
+                        for u, i in zip(self.urls, self.results)],
+        }
+
+
+class Server:
+    """本地 HTTP API 服务
+
+    POST /jobs 提交作品链接并立即返回任务 ID；GET /jobs/{id} 查询任务状态与每个作品的处理结果；
+    DELETE /jobs/{id} 取消任务。全部任务共用 XHS 实例的网络会话与下载记录，
+    由 XHS.concurrency 个工作协程逐个作品处理。"""
+    JOBS_LIMIT = 1000
+
+    def __init__(self, xhs: XHS, host: str = None, port: int = None):
+        self.xhs = xhs
+        self.host = host or xhs.server_host
+        self.port = port or xhs.server_port
+        self.queue: Queue[tuple[Job, int]] = Queue()
+        self.jobs: dict[str, Job] = {}
+        self.workers: list[Task] = []
+        self.runner: web.AppRunner | None = None
+        self.app = web.Application()
+        self.app.router.add_post("/jobs", self.__create_job)
+        self.app.router.add_get("/jobs", self.__list_jobs)
+        self.app.router.add_get("/jobs/{id}", self.__get_job)
+        self.app.router.add_delete("/jobs/{id}", self.__cancel_job)
+
+    async def start(self) -> None:
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        self.workers = [create_task(self.__worker()) for _ in range(self.xhs.concurrency)]
+        logging(None, self.xhs.prompt.server_start(self.host, self.port))
+
+    async def stop(self) -> None:
+        for job in self.jobs.values():
+            job.cancel()
+        for worker in self.workers:
+            worker.cancel()
+        for worker in self.workers:
+            try:
+                await worker
+            except CancelledError:
+                pass
+        self.workers = []
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def run_forever(self) -> None:
+        await self.start()
+        try:
+            await Event().wait()
+        finally:
+            await self.stop()
+
+    def submit(self, urls: list[str], download=True, index: list = None) -> Job:
+        job = Job(urls, download, index)
+        self.jobs[job.id] = job
+        for i in range(len(urls)):
+            self.queue.put_nowait((job, i))
+        self.__prune_jobs()
+        return job
+
+    def __prune_jobs(self) -> None:
+        """仅保留最近 JOBS_LIMIT 个已结束的任务"""
+        ended = [k for k, v in self.jobs.items() if v.status in {Job.FINISHED, Job.CANCELLED}]
+        for key in ended[:max(len(ended) - self.JOBS_LIMIT, 0)]:
+            del self.jobs[key]
+
+    async def __worker(self) -> None:
+        while True:
+            job, i = await self.queue.get()
+            if job.status == Job.CANCELLED:
+                job.done(i, {"url": job.urls[i], "status": Job.CANCELLED, "data": {}})
+                continue
+            job.status = Job.RUNNING
+            task = create_task(self.xhs.extract(job.urls[i], job.download, job.index, concurrency=1))
+            job.tasks.add(task)
+            try:
+                result = await task
+                data = result[0] if result else {}
+                job.done(i, {"url": job.urls[i], "status": "success" if data else "failure", "data": data})
+            except CancelledError:
+                if current_task().cancelling():
+                    raise
+                job.done(i, {"url": job.urls[i], "status": Job.CANCELLED, "data": {}})
+            except Exception as error:
+                logging(None, str(error), ERROR)
+                job.done(i, {"url": job.urls[i], "status": "failure", "data": {}})
+            finally:
+                job.tasks.discard(task)
+
+    async def __create_job(self, request: web.Request) -> web.Response:
+        try:
+            data = await request.json()
+        except JSONDecodeError:
+            return self.__response({"message": self.xhs.prompt.server_invalid_json}, 400)
+        urls = data.get("urls") if isinstance(data, dict) else None
+        if isinstance(urls, str):
+            urls = urls.split()
+        if not urls or not isinstance(urls, list) or not all(isinstance(i, str) for i in urls):
+            return self.__response({"message": self.xhs.prompt.server_invalid_urls}, 400)
+        job = self.submit(urls, bool(data.get("download", True)), data.get("index") or None)
+        return self.__response(job.summary(), 202)
+
+    async def __list_jobs(self, request: web.Request) -> web.Response:
+        return self.__response([i.summary() for i in self.jobs.values()])
+
+    async def __get_job(self, request: web.Request) -> web.Response:
+        if not (job := self.jobs.get(request.match_info["id"])):
+            return self.__response({"message": self.xhs.prompt.server_job_not_found}, 404)
+        return self.__response(job.json())
+
+    async def __cancel_job(self, request: web.Request) -> web.Response:
+        if not (job := self.jobs.get(request.match_info["id"])):
+            return self.__response({"message": self.xhs.prompt.server_job_not_found}, 404)
+        job.cancel()
+        return self.__response(job.summary())
+
+    @staticmethod
+    def __response(data: dict | list, status: int = 200) -> web.Response:
+        return web.json_response(data, status=status, dumps=partial(dumps, ensure_ascii=False))
+
+
+async def serve(host: str = None, port: int = None) -> None:
+    """读取配置文件并启动 API 服务，直到进程被终止"""
+    async with XHS(**Settings(ROOT).run()) as xhs:
+        await Server(xhs, host, port).run_forever()
@@ -53,6 +53,8 @@ class Setting(Screen):
             Input(str(self.data["chunk"]), placeholder="1048576", type="integer", id="chunk", ),
             Label(self.prompt.max_retry, classes="params", ),
             Input(str(self.data["max_retry"]), placeholder="5", type="integer", id="max_retry", ),
+            Label(self.prompt.concurrency, classes="params", ),
+            Input(str(self.data["concurrency"]), placeholder="1", type="integer", id="concurrency", ),
             Container(
                 Label("", classes="params", ),
                 Label("", classes="params", ),
@@ -90,7 +92,7 @@ class Setting(Screen):
 
     @on(Button.Pressed, "#save")
     def save_settings(self):
-        self.dismiss({
+        self.dismiss(self.data | {
             "work_path": self.query_one("#work_path").value,
             "folder_name": self.query_one("#folder_name").value,
             "user_agent": self.query_one("#user_agent").value,
@@ -103,6 +105,7 @@ class Setting(Screen):
             "image_format": self.query_one("#image_format").value,
             "folder_mode": self.query_one("#folder_mode").value,
             "language": self.query_one("#language").value,
+            "concurrency": int(self.query_one("#concurrency").value),
         })
 
     @on(Button.Pressed, "#abandon")
@@ -1,5 +1,8 @@
 from .CLI import cli
+from .CLI import worker
+from .TUI import Server
 from .TUI import XHSDownloader
+from .TUI import serve
 from .application import XHS
 
-__all__ = ['XHS', 'XHSDownloader', 'cli']
+__all__ = ['XHS', 'XHSDownloader', 'Server', 'cli', 'serve', 'worker']
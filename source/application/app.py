@@ -1,36 +1,45 @@
 import json
-import os
+from asyncio import AbstractEventLoop
 from asyncio import Event
 from asyncio import Queue
-from asyncio import QueueEmpty
+from asyncio import Semaphore
 from asyncio import gather
-from asyncio import sleep
-from contextlib import suppress
+from asyncio import Task
+from asyncio import create_task
+from asyncio import get_running_loop
+from asyncio import to_thread
+from pathlib import Path
 from re import compile
+from threading import Thread
+from time import perf_counter
+from time import sleep
+from typing import Iterable
+from warnings import warn
 
 from pyperclip import paste
 
-from source.expansion import Converter
-from source.expansion import Namespace
 from source.module import IDRecorder
 from source.module import Manager
+from source.module import Manifest
+from source.module import PageCache
+from source.module import ShortLinkCache
+from source.module import TRANSCODE
 from source.module import (
     ROOT,
     ERROR,
     WARNING,
 )
 from source.module import logging
-from source.module import wait
 from source.translator import (
     LANGUAGE,
     Chinese,
     English,
 )
 from .download import Download
-from .explore import Explore
-from .image import Image
+from .parser import convert
+from .parser import extract
+from .parser import parse
 from .request import Html
-from .video import Video
 
 __all__ = ["XHS"]
 
@@ -39,6 +48,7 @@ class XHS:
     LINK = compile(r"https?://www\.xiaohongshu\.com/explore/[a-z0-9]+")
     SHARE = compile(r"https?://www\.xiaohongshu\.com/discovery/item/[a-z0-9]+")
     SHORT = compile(r"https?://xhslink\.com/[A-Za-z0-9]+")
+    RESOLVE_LIMIT = 8
     __INSTANCE = None
 
     def __new__(cls, *args, **kwargs):
@@ -61,8 +71,36 @@ class XHS:
             folder_mode=False,
             language="zh-CN",
             language_object: Chinese | English = None,
+            concurrency=1,
+            download_limit=8,
+            host_limit=4,
+            link_cache_ttl=7 * 24 * 60 * 60,
+            page_cache=False,
+            page_cache_size=512,
+            page_cache_ttl=24 * 60 * 60,
+            offline=False,
+            writer_threads=4,
+            fsync=False,
+            preallocate=False,
+            media_store=False,
+            metrics=False,
+            connection_limit=100,
+            connection_host_limit=0,
+            dns_cache_ttl=300,
+            keepalive_timeout=30,
+            read_timeout=0,
+            total_timeout=0,
+            server=False,
+            server_host="127.0.0.1",
+            server_port=5556,
+            parse_processes=0,
+            image_transcode=False,
+            keep_webp=False,
+            validate_files=False,
     ):
         self.prompt = language_object or LANGUAGE.get(language, Chinese)
+        if image_transcode and not TRANSCODE:
+            logging(None, self.prompt.transcode_unavailable, WARNING)
         self.manager = Manager(
             ROOT,
             work_path,
@@ -76,40 +114,65 @@ class XHS:
             record_data,
             image_format,
             folder_mode,
+            download_limit,
+            host_limit,
+            writer_threads,
+            fsync,
+            preallocate,
+            media_store,
+            metrics,
+            connection_limit,
+            connection_host_limit,
+            dns_cache_ttl,
+            keepalive_timeout,
+            read_timeout,
+            total_timeout,
+            parse_processes,
+            image_transcode,
+            keep_webp,
             self.prompt,
         )
         self.html = Html(self.manager)
-        self.image = Image()
-        self.video = Video()
-        self.explore = Explore()
-        self.convert = Converter()
-        self.download = Download(self.manager)
+        self.manifest = Manifest(self.manager) if validate_files else None
+        self.download = Download(self.manager, self.manifest)
         self.recorder = IDRecorder(self.manager)
+        self.link_cache = ShortLinkCache(self.manager, link_cache_ttl)
+        self.limiter = self.manager.limiter
+        self.metrics = self.manager.metrics
+        self.page_cache = PageCache(
+            self.manager, page_cache_size * 1024 * 1024, offline, page_cache_ttl) if page_cache or offline else None
+        self.concurrency = max(concurrency, 1)
+        self.server_host = server_host
+        self.server_port = server_port
         self.clipboard_cache: str = ""
         self.queue = Queue()
         self.event = Event()
-
-    def __extract_image(self, container: dict, data: Namespace):
-        container["下载地址"] = self.image.get_image_link(
-            data, self.manager.image_format)
-
-    def __extract_video(self, container: dict, data: Namespace):
-        container["下载地址"] = self.video.get_video_link(data)
+        self.downloading: dict[str, Event] = {}
 
     async def __download_files(self, container: dict, folder_name, workId, download: bool, index, log, bar):
         name = self.__naming_rules_image(container)
-        folder_name = folder_name.replace("temp/", "")
         # path = self.manager.folder
         path = folder_name
         if (u := container["下载地址"]) and download:
-            if await self.skip_download(i := container["作品ID"]):
-                logging(log, self.prompt.exist_record(i))
-            else:
-                path, result = await self.download.run(u, index, workId, name, container["作品类型"], log, bar)
-                logging(log, self.prompt.exist_record(workId))
-                logging(log, self.prompt.exist_record(path))
-                logging(log, self.prompt.exist_record(name))
-                await self.__add_record(i, result)
+            # 同一作品同时出现多次时，等待正在进行的下载结束后再检查下载记录，避免写入同一个临时文件
+            while running := self.downloading.get(i := container["作品ID"]):
+                await running.wait()
+            self.downloading[i] = Event()
+            try:
+                # 多个进程共用下载记录时，同时只由一个进程下载同一作品
+                await self.recorder.acquire(i)
+                # 校验文件时不根据下载记录跳过作品，由 Download 逐个校验已存在的文件
+                if not self.manifest and await self.skip_download(i):
+                    logging(log, self.prompt.exist_record(i))
+                else:
+                    path, result = await self.download.run(u, index, workId, name, container["作品类型"], log, bar)
+                    logging(log, self.prompt.exist_record(workId))
+                    logging(log, self.prompt.exist_record(path))
+                    logging(log, self.prompt.exist_record(name))
+                    await self.__add_record(i, result)
+            finally:
+                await self.recorder.release(i)
+                self.downloading.pop(i).set()
         elif not u:
             logging(log, self.prompt.download_link_error, ERROR)
         self.manager.save_data(path, name, container)
@@ -122,9 +185,11 @@ class XHS:
                       url: str,
                       download=False,
                       index: list | tuple = None,
-                      efficient=False,
+                      efficient=None,
                       log=None,
-                      bar=None) -> list[dict]:
+                      bar=None,
+                      concurrency: int = None, ) -> list[dict]:
+        self.__deprecated(efficient)
         # return  # 调试代码
         urls = await self.__extract_links(url, log)
         if not urls:
@@ -132,34 +197,113 @@ class XHS:
         else:
             logging(log, self.prompt.pending_processing(len(urls)))
         # return urls  # 调试代码
-        return [await self.__deal_extract(i, download, index, efficient, log, bar) for i in urls]
+        return await self.__deal_extracts(
+            urls, concurrency or self.concurrency, download, index, log, bar)
+
+    async def __deal_extracts(self, urls: list, concurrency: int, *args) -> list[dict]:
+        """按输入顺序返回结果，同时最多处理 concurrency 个作品"""
+        result = [{} for _ in urls]
+        pending = iter(enumerate(urls))
+
+        async def worker():
+            for i, url in pending:
+                result[i] = await self.__deal_extract_safe(url, *args)
+
+        await gather(*(worker() for _ in range(min(max(concurrency, 1), len(urls)))))
+        return result
+
+    async def __deal_extract_safe(self, url: str, download: bool, index: list | tuple | None, log, bar) -> dict:
+        try:
+            with self.metrics.measure("note"):
+                result = await self.__deal_extract(url, download, index, log, bar)
+        except Exception as error:
+            logging(log, str(error), ERROR)
+            logging(log, self.prompt.extract_data_failure(url), ERROR)
+            result = {}
+        self.metrics.count("notes_total", result="success" if result else "failure")
+        return result
 
     async def extract_cli(self,
                           url: str,
                           download=True,
                           index: list | tuple = None,
-                          efficient=True,
+                          efficient=None,
                           log=None,
                           bar=None) -> None:
+        self.__deprecated(efficient)
         url = await self.__extract_links(url, log)
         if not url:
             logging(log, self.prompt.extract_link_failure, WARNING)
         else:
-            await self.__deal_extract(url[0], download, index, efficient, log, bar)
+            await self.__deal_extracts(url, self.concurrency, download, index, log, bar)
+
+    async def extract_stream(self,
+                             source: Iterable[str],
+                             download=True,
+                             index: list | tuple = None,
+                             log=None,
+                             bar=None,
+                             concurrency: int = None, ) -> dict:
+        """逐行读取 source 中的作品链接并处理，适用于链接文件或标准输入；不保留作品数据，内存占用与链接数量无关"""
+        concurrency = max(concurrency or self.concurrency, 1)
+        queue = Queue(maxsize=concurrency * 2)
+        summary = {"total": 0, "success": 0, "failure": 0, }
+        start = perf_counter()
+
+        async def producer():
+            try:
+                async for line in self.__read_lines(source):
+                    for url in await self.__extract_links(line, log):
+                        await queue.put(url)
+            finally:
+                for _ in range(concurrency):
+                    await queue.put(None)
+
+        async def consumer():
+            while (url := await queue.get()) is not None:
+                result = await self.__deal_extract_safe(url, download, index, log, bar)
+                summary["total"] += 1
+                summary["success" if result else "failure"] += 1
+
+        await gather(producer(), *(consumer() for _ in range(concurrency)))
+        summary["time"] = perf_counter() - start
+        logging(log, self.prompt.batch_summary(**summary))
+        return summary
+
+    @staticmethod
+    async def __read_lines(source: Iterable[str]):
+        """在线程中读取下一行，避免读取标准输入时阻塞事件循环"""
+        iterator = iter(source)
+        while (line := await to_thread(next, iterator, None)) is not None:
+            yield line
+
+    async def extract_ids(self, text: str, log=None) -> list[str]:
+        """提取文本中的作品链接并解析短链接，返回去重后的作品 ID"""
+        return list(dict.fromkeys(self.__extract_id(i) for i in await self.__extract_links(text, log)))
 
     async def __extract_links(self, url: str, log) -> list:
+        semaphore = Semaphore(max(self.concurrency, self.RESOLVE_LIMIT))
         urls = []
-        for i in url.split():
-            if u := self.SHORT.search(i):
-                i = await self.html.request_url(
-                    u.group(), False, log)
+        for i in await gather(*(self.__resolve_link(i, semaphore, log) for i in url.split())):
             if u := self.SHARE.search(i):
                 urls.append(u.group())
             elif u := self.LINK.search(i):
                 urls.append(u.group())
         return urls
 
-    async def __deal_extract(self, url: str, download: bool, index: list | tuple | None, efficient: bool, log, bar):
+    async def __resolve_link(self, text: str, semaphore: Semaphore, log) -> str:
+        if not (u := self.SHORT.search(text)):
+            return text
+        if target := self.link_cache.get(link := u.group()):
+            return target
+        async with semaphore:
+            with self.metrics.measure("resolve"):
+                text = await self.html.resolve_url(link, log)
+        if u := self.SHARE.search(text) or self.LINK.search(text):
+            await self.link_cache.set(link, u.group())
+        return text
+
+    async def __deal_extract(self, url: str, download: bool, index: list | tuple | None, log, bar):
         logging(log, self.prompt.start_processing(url))
         headers = {
             'authority': 'www.xiaohongshu.com',
@@ -178,43 +322,85 @@ class XHS:
             'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
         }
 
-        html = await self.html.request_url(url, True, log, headers=headers, verify_ssl=False)
-        namespace = self.__generate_data_object(html)
-        if not namespace:
+        html, response = await self.__request_page(url, log, headers)
+        if (data := await self.__parse(html)) is None:
+            if response:
+                # 页面缺少作品数据，通常是触发了风控
+                self.limiter.failure(url)
+            self.metrics.error("parse", "NoData")
             logging(log, self.prompt.get_data_failure(url), ERROR)
             return {}
-        await self.__suspend(efficient)
-        data = self.explore.run(namespace)
+        if response:
+            self.limiter.success(url)
+        await self.__cache_page(url, response)
         # logging(log, data)  # 调试代码
         if not data:
+            self.metrics.error("explore", "NoData")
             logging(log, self.prompt.extract_data_failure(url), ERROR)
             return {}
-        match data["作品类型"]:
-            case "视频":
-                self.__extract_video(data, namespace)
-            case "图文":
-                self.__extract_image(data, namespace)
-            case _:
-                data["下载地址"] = []
-        # 创建名为 "A" 的文件夹
-        # folder_name =  "/Volumes/My Passport/Download/" + data["作品ID"]
-        folder_name =  "/Volumes/Extreme SSD/Download/" + data["作品ID"]
-        if not os.path.exists(folder_name):
-            os.makedirs(folder_name)
-
+        folder_name = self.manager.folder.joinpath(data["作品ID"])
         # 将数据保存为 JSON 文件
-        json_filename = os.path.join(folder_name, "data.json")
-        with open(json_filename, "w", encoding="utf-8") as json_file:
-            logging(log, json_filename, self.prompt.processing_completed(data["作品ID"]+"_check"))
-            json.dump(data, json_file, indent=4, ensure_ascii=False)
+        json_filename = folder_name.joinpath("data.json")
+        logging(log, str(json_filename))
+        await self.manager.writer.run(self.__save_json, json_filename, data)
 
         await self.__download_files(data, folder_name, data["作品ID"], download, index, log, bar)
         logging(log, self.prompt.processing_completed(url))
         return data
 
-    def __generate_data_object(self, html: str) -> Namespace:
-        data = self.convert.run(html)
-        return Namespace(data)
+    @staticmethod
+    def __save_json(path: Path, data: dict) -> None:
+        path.parent.mkdir(exist_ok=True)
+        with path.open("w", encoding="utf-8") as json_file:
+            json.dump(data, json_file, indent=4, ensure_ascii=False)
+
+    async def __request_page(self, url: str, log, headers: dict) -> tuple[str, dict]:
+        """返回页面内容与新获取的页面响应；页面来自缓存或请求失败时响应为空字典"""
+        html, entry = "", {}
+        if self.page_cache:
+            html = await self.page_cache.get(id_ := self.__extract_id(url))
+            entry = self.page_cache.entry(id_)
+            # 没有校验信息的页面在有效期内直接使用，过期后重新请求
+            if self.page_cache.offline or (
+                    html and not (entry["etag"] or entry["modified"]) and self.page_cache.fresh(id_)):
+                return html, {}
+        await self.limiter.acquire(url)
+        with self.metrics.measure("page"):
+            response = await self.html.request_page(
+                url, log, entry.get("etag", ""), entry.get("modified", ""), headers=headers, verify_ssl=False)
+        match response.get("status"):
+            case 200:
+                self.metrics.count("page_bytes_total", len(response["text"]))
+                return response["text"], response
+            case 304:
+                self.metrics.count("page_not_modified_total")
+                self.limiter.success(url)
+            case _:
+                self.metrics.error("page", "RequestFailed")
+                self.limiter.failure(url)
+        # 页面未变化或请求失败时使用缓存页面
+        return html, {}
+
+    async def __cache_page(self, url: str, response: dict) -> None:
+        """仅缓存成功提取数据的页面"""
+        if self.page_cache and response:
+            await self.page_cache.put(self.__extract_id(url), response["text"], response["etag"], response["modified"])
+
+    @staticmethod
+    def __extract_id(url: str) -> str:
+        return url.rstrip("/").split("/")[-1]
+
+    async def __parse(self, html: str) -> dict | None:
+        """解析页面并提取作品数据，页面缺少作品数据时返回 None；启用进程池时在子进程中执行"""
+        if self.manager.processes:
+            with self.metrics.measure("parse"):
+                return await self.manager.run_process(parse, html, self.manager.download_format)
+        with self.metrics.measure("parse"):
+            namespace = convert(html)
+        if not namespace:
+            return None
+        with self.metrics.measure("explore"):
+            return extract(namespace, self.manager.download_format)
 
     def __naming_rules(self, data: dict) -> str:
         time_ = data["发布时间"].replace(":", ".")
@@ -226,24 +412,67 @@ class XHS:
         title = data["作品ID"]
         return f"image_{title[:64]}_"
 
-    async def monitor(self, delay=1, download=False, efficient=False, log=None, bar=None) -> None:
+    async def monitor(self, delay=1, download=False, efficient=None, log=None, bar=None,
+                      concurrency: int = None) -> None:
+        """在线程中轮询剪贴板，内容变化时提取作品链接；由 concurrency 个消费者同时处理作品"""
+        self.__deprecated(efficient)
         self.event.clear()
-        await gather(self.__push_link(delay), self.__receive_link(delay, download, efficient, log, bar))
-
-    async def __push_link(self, delay: int):
-        while not self.event.is_set():
-            if (t := paste()).lower() == "close":
-                self.stop_monitor()
-            elif t != self.clipboard_cache:
-                self.clipboard_cache = t
-                [await self.queue.put(i) for i in await self.__extract_links(t, None)]
-            await sleep(delay)
-
-    async def __receive_link(self, delay: int, *args, **kwargs):
-        while not self.event.is_set() or self.queue.qsize() > 0:
-            with suppress(QueueEmpty):
-                await self.__deal_extract(self.queue.get_nowait(), *args, **kwargs)
-            await sleep(delay)
+        loop = get_running_loop()
+        pushes: set[Task] = set()
+        errors: list[Exception] = []
+
+        def push(text: str):
+            pushes.add(task := create_task(self.__push_link(text)))
+            task.add_done_callback(pushes.discard)
+
+        thread = Thread(target=self.__poll_clipboard, args=(loop, push, delay, errors), daemon=True)
+        thread.start()
+        consumers = [create_task(self.__receive_link(download, None, log, bar))
+                     for _ in range(max(concurrency or self.concurrency, 1))]
+        try:
+            await self.event.wait()
+            await to_thread(thread.join)
+            await gather(*pushes)
+            # 处理完队列中剩余的作品链接后结束
+            for _ in consumers:
+                await self.queue.put(None)
+            await gather(*consumers)
+        finally:
+            self.event.set()
+            for i in consumers:
+                i.cancel()
+        if errors:
+            raise errors[0]
+
+    def __poll_clipboard(self, loop: AbstractEventLoop, push, delay: int, errors: list):
+        """在线程中执行，避免读取剪贴板阻塞事件循环；仅在剪贴板内容变化时通知事件循环"""
+        try:
+            while not self.event.is_set():
+                if (t := paste()).lower() == "close":
+                    loop.call_soon_threadsafe(self.stop_monitor)
+                    break
+                elif t != self.clipboard_cache:
+                    self.clipboard_cache = t
+                    loop.call_soon_threadsafe(push, t)
+                sleep(delay)
+        except Exception as error:
+            errors.append(error)
+            loop.call_soon_threadsafe(self.stop_monitor)
+
+    async def __push_link(self, text: str):
+        for i in await self.__extract_links(text, None):
+            await self.queue.put(i)
+
+    async def __receive_link(self, *args, **kwargs):
+        while (url := await self.queue.get()) is not None:
+            await self.__deal_extract_safe(url, *args, **kwargs)
+
+    @staticmethod
+    def __deprecated(efficient) -> None:
+        """efficient 参数已弃用：请求间隔由自适应限速器控制，该参数不再生效"""
+        if efficient is not None:
+            warn("efficient is deprecated and has no effect, request pacing is handled by the rate limiter",
+                 DeprecationWarning, stacklevel=3)
 
     def stop_monitor(self):
         self.event.set()
@@ -251,18 +480,24 @@ class XHS:
     async def skip_download(self, id_: str) -> bool:
         return bool(await self.recorder.select(id_))
 
-    @staticmethod
-    async def __suspend(efficient: bool) -> None:
-        if efficient:
-            return
-        await wait()
-
     async def __aenter__(self):
+        await self.metrics.__aenter__()
         await self.recorder.__aenter__()
+        await self.link_cache.__aenter__()
+        if self.manifest:
+            await self.manifest.__aenter__()
+        if self.page_cache:
+            await self.page_cache.__aenter__()
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
+        if self.page_cache:
+            await self.page_cache.__aexit__(exc_type, exc_value, traceback)
+        if self.manifest:
+            await self.manifest.__aexit__(exc_type, exc_value, traceback)
+        await self.link_cache.__aexit__(exc_type, exc_value, traceback)
         await self.recorder.__aexit__(exc_type, exc_value, traceback)
+        await self.metrics.__aexit__(exc_type, exc_value, traceback)
         await self.close()
 
     async def close(self):
@@ -1,11 +1,18 @@
-import re
 from asyncio import gather
+from contextlib import suppress
+from os import scandir
 from pathlib import Path
+from urllib.parse import urlsplit
 
 from aiohttp import ClientError
 
 from source.module import ERROR
+from source.module import WARNING
+from source.module import Fatal
 from source.module import Manager
+from source.module import Manifest
+from source.module import classify_error
+from source.module import classify_status
 from source.module import logging
 from source.module import retry as re_download
 
@@ -21,18 +28,27 @@ class Download:
         "video/quicktime": "mov",
     }
 
-    def __init__(self, manager: Manager, ):
+    def __init__(self, manager: Manager, manifest: Manifest = None, ):
         self.manager = manager
+        self.manifest = manifest
         self.folder = manager.folder
         self.temp = manager.temp
         self.proxy = manager.proxy
         self.chunk = manager.chunk
         self.session = manager.download_session
+        self.scheduler = manager.scheduler
+        self.limiter = manager.limiter
+        self.writer = manager.writer
+        self.store = manager.store
+        self.metrics = manager.metrics
         self.retry = manager.retry
         self.prompt = manager.prompt
         self.folder_mode = manager.folder_mode
         self.video_format = "mp4"
-        self.image_format = manager.image_format
+        self.image_format = manager.download_format
+        self.transcode = manager.transcode
+        self.keep_webp = manager.keep_webp
+        self.files: dict[Path, set[str]] = {}
 
     async def run(self, urls: list, index: list | tuple | None, workId: str, name: str, type_: str, log, bar) -> tuple[Path, tuple]:
         path = self.__generate_path(workId, name)
@@ -68,7 +84,7 @@ class Download:
             path: Path,
             name: str,
             log) -> list:
-        if any(path.glob(f"{name}.*")):
+        if name in self.__existing_files(path) and not self.manifest:
             logging(log, self.prompt.skip_download(name))
             return []
         return [(urls[0], name, self.video_format)]
@@ -84,20 +100,52 @@ class Download:
         for i, j in enumerate(urls, start=1):
             if index and i not in index:
                 continue
-            # 使用正则表达式提取 / 和 ? 之间的内容
-            match = re.search(r'ci.xiaohongshu.com/(.*?)(\?)', j)
-            extracted_content = ""
-            if match:
-                extracted_content = match.group(1)
-            file = f"{name}_{extracted_content}_{i}"
-            if any(path.glob(f"{file}.*")):
+            file = f"{name}_{self.__image_token(j)}_{i}"
+            if file in self.__existing_files(path) and not self.manifest:
                 logging(log, self.prompt.skip_download(file))
                 continue
             tasks.append([j, file, self.image_format])
         return tasks
 
-    @re_download
+    def __image_token(self, url: str) -> str:
+        """PNG 链接与本地转码的 WebP 链接使用链接路径的最后一段作为文件标识，两者得到相同的文件名称；
+        直接下载 WebP 图片时沿用原有的空标识，已下载的文件仍可识别"""
+        if self.transcode or self.image_format == "png":
+            return urlsplit(url).path.rpartition("/")[2]
+        return ""
+
+    def __existing_files(self, path: Path) -> set[str]:
+        """返回文件夹内已存在文件的名称集合，每个文件夹每次运行只扫描一次"""
+        if (names := self.files.get(path)) is None:
+            names = self.files[path] = self.__scan_files(path)
+        return names
+
+    @staticmethod
+    def __scan_files(path: Path) -> set[str]:
+        """记录文件名中每个 . 之前的部分，与 path.glob(f"{name}.*") 的匹配结果一致"""
+        names = set()
+        with suppress(FileNotFoundError), scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    parts = entry.name.split(".")
+                    names.update(".".join(parts[:i]) for i in range(1, len(parts)))
+        return names
+
+    @re_download(default=False)
     async def __download(self, url: str, path: Path, name: str, format_: str, log, bar):
+        key = self.store.key(url, format_) if self.store else ""
+        if self.manifest and name in self.__existing_files(path):
+            if await self.__validate(url, path, name, log):
+                logging(log, self.prompt.skip_download(name))
+                return True
+            # 已存在的文件需要重新下载，不使用文件仓库中的旧文件
+            key = ""
+        if key and (real := await self.writer.run(self.store.restore, key, path, name)):
+            self.__existing_files(path).add(name)
+            self.metrics.count("store_hits_total")
+            logging(log, self.prompt.store_link(name))
+            await self.__transcode(real, name, log)
+            return True
         try:
             headers = {
                 'authority': 'www.xiaohongshu.com',
@@ -115,40 +163,203 @@ class Download:
                 'upgrade-insecure-requests': '1',
                 'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
             }
-            async with self.session.get(url, proxy=self.proxy, headers=headers, verify_ssl=False) as response: # , verify_ssl=False
-                if response.status != 200:
-                    return False
-                suffix = self.__extract_type(
-                    response.headers.get("Content-Type")) or format_
-                print(name)
-                temp = self.temp.joinpath(name)
-                real = path.joinpath(f"{name}.{suffix}")
+            temp = self.manager.staging(path).joinpath(name)
+            partial = self.__check_partial(temp, url)
+            await self.limiter.acquire(url)
+            async with self.scheduler.slot(url), self.metrics.measure("download"), self.session.get(
+                    url,
+                    proxy=self.proxy,
+                    headers=headers | self.__range_headers(partial),
+                    verify_ssl=False) as response:  # , verify_ssl=False
+                match response.status:
+                    case 200:
+                        partial = self.__generate_partial(url, response, format_, 0)
+                    case 206 if partial:
+                        partial = self.__generate_partial(
+                            url, response, partial["suffix"], partial["offset"])
+                    case 416 if partial and partial["offset"] == partial["length"]:
+                        pass
+                    case 416:
+                        # 断点信息与服务器文件不一致，丢弃后重新下载
+                        self.manager.delete_partial(temp)
+                        return False
+                    case 403 | 429 | 500 | 502 | 503 | 504:
+                        self.limiter.failure(url)
+                        raise classify_status(response.status, response.headers)
+                    case _:
+                        raise classify_status(response.status, response.headers)
+                self.limiter.success(url)
+                real = path.joinpath(f"{name}.{partial['suffix']}")
                 logging(log, self.prompt.download_success(path))
                 # self.__create_progress(
                 #     bar, int(
                 #         response.headers.get(
                 #             'content-length', 0)) or None)
-                with temp.open("wb") as f:
-                    async for chunk in response.content.iter_chunked(self.chunk):
-                        f.write(chunk)
-                        # self.__update_progress(bar, len(chunk))
-            self.manager.move(temp, real)
+                if response.status != 416:
+                    await self.__write(temp, partial, response)
+            if partial["length"] and temp.stat().st_size != partial["length"]:
+                logging(log, self.prompt.download_error(name), ERROR)
+                return False
+            size = temp.stat().st_size
+            with self.metrics.measure("move"):
+                copied = await self.writer.move(temp, real)
+            if copied:
+                self.metrics.count("cross_device_bytes_total", size)
+                logging(log, self.prompt.cross_device_copy(name, size), WARNING)
+            self.__existing_files(path).add(name)
+            if key:
+                await self.writer.run(self.store.add, key, real)
+            self.manager.delete_partial(temp)
+            real = await self.__transcode(real, name, log)
+            await self.__record(url, path, name, real, partial)
             # self.__create_progress(bar, None)
             logging(log, self.prompt.download_success(name))
             # logging(log, real)
             return True
-        except ClientError as error:
-            try:
-                self.manager.delete(temp)
-            except UnboundLocalError:
-                # 如果捕捉到 UnboundLocalError 错误，则执行以下逻辑
-                with open("error_logs.txt", "a") as file:
-                    file.write(f"UnboundLocalError occurred: name={name}\n")
+        except Fatal:
+            logging(log, self.prompt.download_error(name), ERROR)
+            raise
+        except (ClientError, TimeoutError) as error:
+            self.limiter.failure(url)
+            # 保留已下载的部分数据，重试或下次运行时断点续传
             # self.manager.delete(temp)
             # self.__create_progress(bar, None)
             logging(log, str(error), ERROR)
             logging(log, self.prompt.download_error(name), ERROR)
+            raise classify_error(error) from error
+
+    async def __transcode(self, file: Path, name: str, log) -> Path:
+        """将下载的 WebP 图片转换为 PNG 图片，返回转换后的文件路径；转换失败时保留 WebP 图片"""
+        if not self.transcode or file.suffix != ".webp":
+            return file
+        try:
+            with self.metrics.measure("transcode"):
+                await self.manager.run_transcode(file, file.with_suffix(".png"), self.keep_webp)
+        except Exception as error:
+            logging(log, str(error), ERROR)
+            logging(log, self.prompt.transcode_error(name), WARNING)
+            return file
+        return file.with_suffix(".png")
+
+    async def __validate(self, url: str, path: Path, name: str, log) -> bool:
+        """校验已存在的文件，本地文件完整且服务器文件未更新时返回真
+
+        没有校验记录的文件与服务器返回的 Content-Length 比较，一致时补充记录；
+        服务器不支持 HEAD 请求或请求失败时沿用本地文件。"""
+        if not (entry := await self.writer.run(self.manifest.verify, path, name)):
+            if self.manifest.get(path, name) or not (file := self.__find_file(path, name)):
+                logging(log, self.prompt.file_changed(name), WARNING)
+                return False
+            entry = {"url": url, "etag": "", "modified": "", "length": 0,
+                     } | await self.writer.run(self.manifest.describe, file)
+        if (remote := await self.__head(url)) is None:
+            return True
+        if not self.__unchanged(entry, remote):
+            logging(log, self.prompt.file_changed(name), WARNING)
             return False
+        if (update := entry | {k: v for k, v in remote.items() if v} | {"url": url}) != self.manifest.get(path, name):
+            await self.manifest.set(path, name, update)
+        return True
+
+    async def __head(self, url: str) -> dict | None:
+        try:
+            await self.limiter.acquire(url)
+            async with self.scheduler.slot(url), self.metrics.measure("validate"), self.session.head(
+                    url,
+                    proxy=self.proxy,
+                    headers={"Accept-Encoding": "identity"},
+                    allow_redirects=True,
+                    verify_ssl=False) as response:
+                if response.status != 200:
+                    return None
+                self.limiter.success(url)
+                return {
+                    "etag": response.headers.get("ETag", ""),
+                    "modified": response.headers.get("Last-Modified", ""),
+                    "length": self.__extract_length(response, 0),
+                }
+        except (ClientError, TimeoutError):
+            return None
+
+    @staticmethod
+    def __unchanged(entry: dict, remote: dict) -> bool:
+        """优先比较 ETag，其次比较 Last-Modified，都没有时比较文件长度"""
+        if entry["etag"] and remote["etag"]:
+            return entry["etag"] == remote["etag"]
+        if entry["modified"] and remote["modified"]:
+            return entry["modified"] == remote["modified"]
+        return bool(remote["length"]) and remote["length"] == (entry["length"] or entry["size"])
+
+    async def __record(self, url: str, path: Path, name: str, file: Path, partial: dict) -> None:
+        """记录下载完成的文件的校验信息"""
+        if self.manifest:
+            await self.manifest.set(path, name, {
+                "url": url,
+                "etag": partial["etag"],
+                "modified": partial["modified"],
+                "length": partial["length"],
+            } | await self.writer.run(self.manifest.describe, file))
+
+    @staticmethod
+    def __find_file(path: Path, name: str) -> Path | None:
+        with suppress(FileNotFoundError), scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.startswith(f"{name}."):
+                    return Path(entry.path)
+        return None
+
+    async def __write(self, temp: Path, partial: dict, response) -> None:
+        # 预分配空间的文件在写入结束前大小不代表已下载长度，中途崩溃时不可续传
+        partial["allocated"] = self.writer.preallocate and bool(partial["length"]) and not partial["offset"]
+        self.manager.write_partial(temp, partial)
+        try:
+            async with self.writer.open(
+                    temp,
+                    "ab" if partial["offset"] else "wb",
+                    partial["length"] if partial["allocated"] else 0, ) as f:
+                async for chunk in response.content.iter_chunked(self.chunk):
+                    await f.write(chunk)
+                    self.metrics.count("download_bytes_total", len(chunk))
+                    # self.__update_progress(bar, len(chunk))
+        finally:
+            if partial.pop("allocated"):
+                self.manager.write_partial(temp, partial)
+
+    def __check_partial(self, temp: Path, url: str) -> dict:
+        """读取断点续传信息，缺少校验信息或与当前链接不符时丢弃已下载的部分数据"""
+        partial = self.manager.read_partial(temp)
+        if not partial or partial.get("url") != url or partial.get("allocated") or not (
+                partial.get("etag") or partial.get("modified")) or not temp.is_file():
+            self.manager.delete_partial(temp)
+            return {}
+        partial["offset"] = temp.stat().st_size
+        return partial
+
+    @staticmethod
+    def __range_headers(partial: dict) -> dict:
+        if not partial or not partial["offset"]:
+            return {"Accept-Encoding": "identity"}
+        return {
+            "Accept-Encoding": "identity",
+            "Range": f"bytes={partial['offset']}-",
+            "If-Range": partial["etag"] or partial["modified"],
+        }
+
+    def __generate_partial(self, url: str, response, suffix: str, offset: int) -> dict:
+        return {
+            "url": url,
+            "suffix": self.__extract_type(response.headers.get("Content-Type")) or suffix,
+            "length": self.__extract_length(response, offset),
+            "etag": response.headers.get("ETag", ""),
+            "modified": response.headers.get("Last-Modified", ""),
+            "offset": offset,
+        }
+
+    @staticmethod
+    def __extract_length(response, offset: int) -> int:
+        if response.status == 206 and (r := response.headers.get("Content-Range", "")).rpartition("/")[2].isdigit():
+            return int(r.rpartition("/")[2])
+        return int(length) + offset if (length := response.headers.get("Content-Length", "")).isdigit() else 0
 
     @staticmethod
     def __create_progress(bar, total: int | None):
@@ -0,0 +1,34 @@
+from source.expansion import Converter
+from source.expansion import Namespace
+from .explore import Explore
+from .image import Image
+from .video import Video
+
+__all__ = ["convert", "extract", "parse", ]
+
+CONVERTER = Converter()
+EXPLORE = Explore()
+
+
+def convert(html: str) -> Namespace:
+    return Namespace(CONVERTER.run(html))
+
+
+def extract(namespace: Namespace, image_format: str) -> dict:
+    """提取作品数据与下载地址，提取失败时返回空字典"""
+    data = EXPLORE.run(namespace)
+    match data.get("作品类型"):
+        case "视频":
+            data["下载地址"] = Video.get_video_link(namespace)
+        case "图文":
+            data["下载地址"] = Image.get_image_link(namespace, image_format)
+        case _ if data:
+            data["下载地址"] = []
+    return data
+
+
+def parse(html: str, image_format: str) -> dict | None:
+    """解析页面并提取作品数据，页面缺少作品数据时返回 None
+
+    可在子进程中执行，只返回提取后的作品数据，完整的页面数据不会序列化传回主进程。"""
+    return extract(namespace, image_format) if (namespace := convert(html)) else None
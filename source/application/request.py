@@ -1,7 +1,10 @@
 from aiohttp import ClientError
+from yarl import URL
 
 from source.module import ERROR
 from source.module import Manager
+from source.module import classify_error
+from source.module import classify_status
 from source.module import logging
 from source.module import retry
 
@@ -9,13 +12,15 @@ __all__ = ["Html"]
 
 
 class Html:
+    REDIRECT = {301, 302, 303, 307, 308}
+
     def __init__(self, manager: Manager, ):
         self.proxy = manager.proxy
         self.retry = manager.retry
         self.prompt = manager.prompt
         self.session = manager.request_session
 
-    @retry
+    @retry(default="")
     async def request_url(
             self,
             url: str,
@@ -30,12 +35,73 @@ class Html:
                     **kwargs,
             ) as response:
                 if response.status != 200:
-                    return ""
+                    raise classify_status(response.status, response.headers)
                 return await response.text() if content else str(response.url)
-        except ClientError as error:
+        except (ClientError, TimeoutError) as error:
+            logging(log, str(error), ERROR)
+            logging(log, self.prompt.request_error(url), ERROR)
+            raise classify_error(error) from error
+
+    @retry(default={})
+    async def request_page(
+            self,
+            url: str,
+            log=None,
+            etag="",
+            modified="",
+            **kwargs,
+    ) -> dict:
+        """携带 If-None-Match / If-Modified-Since 请求页面，页面未变化时返回 304 状态码"""
+        headers = kwargs.pop("headers", {}) | {
+            k: v for k, v in (("If-None-Match", etag), ("If-Modified-Since", modified)) if v}
+        try:
+            async with self.session.get(
+                    url,
+                    proxy=self.proxy,
+                    headers=headers,
+                    **kwargs,
+            ) as response:
+                match response.status:
+                    case 304:
+                        return {"status": 304, }
+                    case 200:
+                        return {
+                            "status": 200,
+                            "text": await response.text(),
+                            "etag": response.headers.get("ETag", ""),
+                            "modified": response.headers.get("Last-Modified", ""),
+                        }
+                raise classify_status(response.status, response.headers)
+        except (ClientError, TimeoutError) as error:
             logging(log, str(error), ERROR)
             logging(log, self.prompt.request_error(url), ERROR)
+            raise classify_error(error) from error
+
+    @retry(default="")
+    async def resolve_url(self, url: str, log=None, hops=5, ) -> str:
+        """逐跳读取重定向响应的 Location，离开短链接域名时返回目标地址，不下载页面内容"""
+        host = URL(url).host
+        try:
+            for _ in range(hops):
+                async with self.session.get(
+                        url,
+                        proxy=self.proxy,
+                        allow_redirects=False,
+                ) as response:
+                    if response.status == 200:
+                        return str(response.url)
+                    if response.status not in self.REDIRECT:
+                        raise classify_status(response.status, response.headers)
+                    if not (location := response.headers.get("Location")):
+                        return ""
+                    url = str(response.url.join(URL(location)))
+                    if URL(url).host != host:
+                        return url
             return ""
+        except (ClientError, TimeoutError) as error:
+            logging(log, str(error), ERROR)
+            logging(log, self.prompt.request_error(url), ERROR)
+            raise classify_error(error) from error
 
     @staticmethod
     def format_url(url: str) -> str:
@@ -1,4 +1,5 @@
+from .accessor import Accessor
 from .converter import Converter
 from .namespace import Namespace
 
-__all__ = ["Converter", "Namespace", ]
+__all__ = ["Accessor", "Converter", "Namespace", ]
@@ -0,0 +1,64 @@
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Union
+
+__all__ = ["Accessor"]
+
+
+class Accessor:
+    """预先解析的属性链，例如 interactInfo.likedCount、imageList[0].urlDefault
+
+    直接读取 dict / list 数据，不复制任何对象。"""
+    __slots__ = ("chain", "steps",)
+    INVALID = object()
+
+    def __init__(self, chain: str):
+        self.chain = chain
+        self.steps = self.__parse(chain)
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def compile(cls, chain: str) -> "Accessor":
+        return cls(chain)
+
+    @classmethod
+    def __parse(cls, chain: str) -> tuple[tuple[str, Union[int, object, None]], ...]:
+        steps = []
+        for attribute in chain.split("."):
+            if "[" in attribute:
+                attribute, index = attribute.split("[", 1)
+                try:
+                    index = int(index[:-1])
+                except ValueError:
+                    index = cls.INVALID
+                steps.append((attribute, index))
+            else:
+                steps.append((attribute, None))
+        return tuple(steps)
+
+    def extract(
+            self,
+            data: Union[dict, SimpleNamespace],
+            default: Union[str, int, list, dict] = "", ):
+        for attribute, index in self.steps:
+            data = self.__get(data, attribute)
+            if index is None:
+                if not data:
+                    return default
+            elif index is self.INVALID:
+                return default
+            else:
+                try:
+                    data = data[index]
+                except (IndexError, KeyError, TypeError):
+                    return default
+        return data or default
+
+    @staticmethod
+    def __get(data, attribute: str):
+        if isinstance(data, dict):
+            return data.get(attribute)
+        return getattr(data, attribute, None) if isinstance(data, SimpleNamespace) else None
+
+    def __repr__(self):
+        return f"Accessor({self.chain!r})"
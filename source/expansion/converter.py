@@ -1,3 +1,6 @@
+from json import JSONDecodeError
+from json import loads
+from re import compile
 from typing import Union
 
 from lxml.etree import HTML
@@ -8,6 +11,10 @@ __all__ = ["Converter"]
 
 class Converter:
     INITIAL_STATE = "(//script)[last()]/text()"
+    STATE_ASSIGNMENT = compile(r"window\.__INITIAL_STATE__\s*=\s*")
+    SCRIPT_END = "</script>"
+    # 匹配 JSON 字符串或字符串以外的 JavaScript 专有值，字符串原样保留
+    JS_TOKEN = compile(r'"(?:[^"\\]|\\.)*"|\bundefined\b|\bNaN\b|-?\bInfinity\b')
     KEYS_LINK = (
         "note",
         "noteDetailMap",
@@ -17,9 +24,26 @@ class Converter:
 
     def run(self, content: str) -> dict:
         return self.__filter_object(
-            self.__convert_object(
+            self.fast_convert(content) or self.__convert_object(
                 self.__extract_object(content)))
 
+    @classmethod
+    def fast_convert(cls, html: str) -> dict:
+        """直接定位 __INITIAL_STATE__ 赋值语句并按 JSON 解析，失败时返回空字典"""
+        if not html or not (assignment := cls.STATE_ASSIGNMENT.search(html)):
+            return {}
+        end = html.find(cls.SCRIPT_END, start := assignment.end())
+        text = html[start:end if end != -1 else None].strip().rstrip(";")
+        try:
+            data = loads(cls.JS_TOKEN.sub(cls.__replace_token, text))
+        except (JSONDecodeError, RecursionError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    @staticmethod
+    def __replace_token(match) -> str:
+        return t if (t := match.group()).startswith('"') else "null"
+
     def __extract_object(self, html: str) -> str:
         if not html:
             return ""
@@ -1,13 +1,14 @@
-from copy import deepcopy
 from types import SimpleNamespace
 from typing import Union
 
+from .accessor import Accessor
+
 __all__ = ["Namespace"]
 
 
 class Namespace:
     def __init__(self, data: dict) -> None:
-        self.data: SimpleNamespace = self.generate_data_object(data)
+        self.data: dict = data or {}
 
     @staticmethod
     def generate_data_object(data: dict) -> SimpleNamespace:
@@ -26,46 +27,20 @@ class Namespace:
             self,
             attribute_chain: str,
             default: Union[str, int, list, dict, SimpleNamespace] = ""):
-        return self.__safe_extract(self.data, attribute_chain, default)
-
-    @staticmethod
-    def __safe_extract(
-            data_object: SimpleNamespace,
-            attribute_chain: str,
-            default: Union[str, int, list, dict, SimpleNamespace] = "", ):
-        data = deepcopy(data_object)
-        attributes = attribute_chain.split(".")
-        for attribute in attributes:
-            if "[" in attribute:
-                parts = attribute.split("[", 1)
-                attribute = parts[0]
-                index = parts[1][:-1]
-                try:
-                    index = int(index)
-                    data = getattr(data, attribute, None)[index]
-                except (IndexError, TypeError, ValueError):
-                    return default
-            else:
-                data = getattr(data, attribute, None)
-                if not data:
-                    return default
-        return data or default
+        return Accessor.compile(attribute_chain).extract(self.data, default)
 
     @classmethod
     def object_extract(
             cls,
-            data_object: SimpleNamespace,
+            data_object: Union[dict, SimpleNamespace],
             attribute_chain: str,
             default: Union[str, int, list, dict, SimpleNamespace] = "",
     ):
-        return cls.__safe_extract(
-            data_object,
-            attribute_chain,
-            default, )
+        return Accessor.compile(attribute_chain).extract(data_object, default)
 
     @property
     def __dict__(self):
-        return self.convert_to_dict(self.data)
+        return self.data
 
     @classmethod
     def convert_to_dict(cls, data) -> dict:
@@ -76,4 +51,4 @@ class Namespace:
             value in vars(data).items()}
 
     def __bool__(self):
-        return bool(vars(self.data))
+        return bool(self.data)
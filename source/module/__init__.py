@@ -1,7 +1,18 @@
 from .extend import Account
+from .limiter import RateLimiter
+from .metrics import Metrics
 from .manager import Manager
+from .cache import PageCache
+from .cache import ShortLinkCache
 from .recorder import IDRecorder
+from .jobs import JobQueue
+from .manifest import Manifest
+from .scheduler import Scheduler
 from .settings import Settings
+from .store import MediaStore
+from .writer import Writer
+from .transcode import TRANSCODE
+from .transcode import transcode
 from .static import (
     VERSION_MAJOR,
     VERSION_MINOR,
@@ -25,14 +36,29 @@ from .static import (
 from .tools import (
     retry,
     logging,
-    wait,
+    Fatal,
+    Transient,
+    Throttled,
+    classify_status,
+    classify_error,
 )
 
 __all__ = [
     "Account",
     "Settings",
     "IDRecorder",
+    "JobQueue",
+    "Manifest",
+    "ShortLinkCache",
+    "PageCache",
+    "Scheduler",
     "Manager",
+    "RateLimiter",
+    "Metrics",
+    "MediaStore",
+    "Writer",
+    "TRANSCODE",
+    "transcode",
     "VERSION_MAJOR",
     "VERSION_MINOR",
     "VERSION_BETA",
@@ -52,6 +78,10 @@ __all__ = [
     "HEADERS",
     "retry",
     "logging",
-    "wait",
+    "Fatal",
+    "Transient",
+    "Throttled",
+    "classify_status",
+    "classify_error",
     "PROJECT",
 ]
@@ -0,0 +1,128 @@
+from asyncio import to_thread
+from gzip import BadGzipFile
+from gzip import compress
+from gzip import decompress
+from json import JSONDecodeError
+from json import dump
+from json import load
+from pathlib import Path
+from time import time
+
+from aiosqlite import connect
+
+from source.module import Manager
+
+__all__ = ["ShortLinkCache", "PageCache", ]
+
+
+class ShortLinkCache:
+    """短链接解析结果缓存，保存至数据库，超过 ttl 秒的记录视为失效"""
+
+    def __init__(self, manager: Manager, ttl: int):
+        self.file = manager.root.joinpath("XHS-Downloader.db")
+        self.ttl = ttl
+        self.database = None
+        self.links: dict[str, tuple[str, float]] = {}
+
+    async def __connect_database(self):
+        self.database = await connect(self.file)
+        await self.database.execute("PRAGMA journal_mode=WAL;")
+        await self.database.execute(
+            "CREATE TABLE IF NOT EXISTS short_links (LINK TEXT PRIMARY KEY, TARGET TEXT, TIME REAL);")
+        await self.database.execute("DELETE FROM short_links WHERE TIME<?", (time() - self.ttl,))
+        await self.database.commit()
+        async with self.database.execute("SELECT LINK, TARGET, TIME FROM short_links") as cursor:
+            self.links = {i[0]: (i[1], i[2]) for i in await cursor.fetchall()}
+
+    def get(self, link: str) -> str:
+        if (target := self.links.get(link)) and target[1] + self.ttl > time():
+            return target[0]
+        return ""
+
+    async def set(self, link: str, target: str) -> None:
+        self.links[link] = (target, now := time())
+        if not self.database:
+            return
+        await self.database.execute("REPLACE INTO short_links VALUES (?, ?, ?);", (link, target, now))
+        await self.database.commit()
+
+    async def __aenter__(self):
+        await self.__connect_database()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.database.close()
+
+
+class PageCache:
+    """作品页面缓存，以作品 ID 为键压缩保存至磁盘，超过 size 字节时删除最久未使用的页面
+
+    缓存时间超过 ttl 秒的页面视为过期，ttl 为 0 时不过期。"""
+    SUFFIX = ".html.gz"
+
+    def __init__(self, manager: Manager, size: int, offline: bool, ttl: int = 0):
+        self.folder = manager.root.joinpath("cache")
+        self.index_file = self.folder.joinpath("index.json")
+        self.size = size
+        self.offline = offline
+        self.ttl = ttl
+        self.index: dict[str, dict] = {}
+
+    def __load(self):
+        self.folder.mkdir(exist_ok=True)
+        try:
+            with self.index_file.open("r", encoding="utf-8") as f:
+                index = load(f)
+        except (OSError, JSONDecodeError):
+            index = {}
+        files = sorted(self.folder.glob(f"*{self.SUFFIX}"), key=lambda i: i.stat().st_mtime)
+        for file in files:
+            if (id_ := file.name.removesuffix(self.SUFFIX)) not in index:
+                index[id_] = {"etag": "", "modified": "", "size": file.stat().st_size, "time": file.stat().st_mtime, }
+        self.index = {k: v for k, v in index.items() if self.__file(k).is_file()}
+
+    def __save(self):
+        with self.index_file.open("w", encoding="utf-8") as f:
+            dump(self.index, f)
+
+    def __file(self, id_: str) -> Path:
+        return self.folder.joinpath(f"{id_}{self.SUFFIX}")
+
+    def entry(self, id_: str) -> dict:
+        return self.index.get(id_, {})
+
+    def fresh(self, id_: str) -> bool:
+        return not self.ttl or self.index.get(id_, {}).get("time", 0) + self.ttl > time()
+
+    async def get(self, id_: str) -> str:
+        if id_ not in self.index:
+            return ""
+        try:
+            data = await to_thread(self.__file(id_).read_bytes)
+            html = await to_thread(decompress, data)
+        except (OSError, EOFError, BadGzipFile):
+            self.index.pop(id_, None)
+            return ""
+        self.index[id_] = self.index.pop(id_)
+        return html.decode("utf-8")
+
+    async def put(self, id_: str, html: str, etag: str, modified: str) -> None:
+        data = await to_thread(compress, html.encode("utf-8"))
+        await to_thread(self.__file(id_).write_bytes, data)
+        self.index.pop(id_, None)
+        self.index[id_] = {"etag": etag, "modified": modified, "size": len(data), "time": time(), }
+        self.__evict()
+
+    def __evict(self):
+        total = sum(i["size"] for i in self.index.values())
+        while total > self.size and len(self.index) > 1:
+            id_ = next(iter(self.index))
+            total -= self.index.pop(id_)["size"]
+            self.__file(id_).unlink(missing_ok=True)
+
+    async def __aenter__(self):
+        self.__load()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.__save()
@@ -0,0 +1,110 @@
+from asyncio import Lock
+from time import time
+
+from aiosqlite import connect
+
+from source.module import Manager
+
+__all__ = ["JobQueue"]
+
+
+class JobQueue:
+    """保存在数据库中的作品任务队列，以作品 ID 表示任务，可由多个进程同时处理
+
+    进程领取任务时获得 LEASE 秒的租约并定期续约；进程异常退出后租约到期，任务可被其他进程重新领取。
+    失败或租约到期的任务最多处理 ATTEMPTS 次。"""
+    LEASE = 60
+    ATTEMPTS = 3
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, manager: Manager, lease: int = LEASE):
+        self.file = manager.root.joinpath("XHS-Downloader.db")
+        self.lease = lease
+        self.database = None
+        self.lock = Lock()
+
+    async def __connect_database(self):
+        # 手动管理事务，领取任务时使用 BEGIN IMMEDIATE 取得写锁
+        self.database = await connect(self.file, isolation_level=None)
+        await self.database.execute("PRAGMA journal_mode=WAL;")
+        await self.database.execute("PRAGMA busy_timeout=30000;")
+        await self.database.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "ID INTEGER PRIMARY KEY AUTOINCREMENT, NOTE TEXT, DOWNLOAD INTEGER, STATUS TEXT, "
+            "WORKER TEXT, LEASE REAL, ATTEMPTS INTEGER, UPDATED REAL);")
+        await self.database.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (STATUS, LEASE);")
+
+    async def add(self, notes: list[str], download=True) -> int:
+        """添加任务，跳过已在队列中等待或正在处理的作品，返回新增任务数量"""
+        async with self.lock:
+            await self.database.execute("BEGIN IMMEDIATE;")
+            try:
+                async with self.database.execute(
+                        "SELECT NOTE FROM jobs WHERE STATUS IN (?, ?);", (self.QUEUED, self.RUNNING)) as cursor:
+                    exists = {i[0] for i in await cursor.fetchall()}
+                notes = [i for i in dict.fromkeys(notes) if i not in exists]
+                await self.database.executemany(
+                    "INSERT INTO jobs (NOTE, DOWNLOAD, STATUS, WORKER, LEASE, ATTEMPTS, UPDATED) "
+                    "VALUES (?, ?, ?, '', 0, 0, ?);",
+                    [(i, int(download), self.QUEUED, time()) for i in notes])
+                await self.database.commit()
+            except BaseException:
+                await self.database.rollback()
+                raise
+        return len(notes)
+
+    async def claim(self, worker: str, number: int = 1) -> list[tuple[int, str, bool]]:
+        """领取最多 number 个等待中或租约已过期的任务；租约过期且已达到 ATTEMPTS 次的任务标记为失败"""
+        now = time()
+        async with self.lock:
+            await self.database.execute("BEGIN IMMEDIATE;")
+            try:
+                await self.database.execute(
+                    "UPDATE jobs SET STATUS=?, WORKER='', LEASE=0, UPDATED=? "
+                    "WHERE STATUS=? AND LEASE<? AND ATTEMPTS>=?;",
+                    (self.FAILED, now, self.RUNNING, now, self.ATTEMPTS))
+                async with self.database.execute(
+                        "SELECT ID, NOTE, DOWNLOAD FROM jobs WHERE STATUS=? OR (STATUS=? AND LEASE<?) "
+                        "ORDER BY ID LIMIT ?;", (self.QUEUED, self.RUNNING, now, number)) as cursor:
+                    jobs = [(i[0], i[1], bool(i[2])) for i in await cursor.fetchall()]
+                await self.database.executemany(
+                    "UPDATE jobs SET STATUS=?, WORKER=?, LEASE=?, ATTEMPTS=ATTEMPTS+1, UPDATED=? WHERE ID=?;",
+                    [(self.RUNNING, worker, now + self.lease, now, i[0]) for i in jobs])
+                await self.database.commit()
+            except BaseException:
+                await self.database.rollback()
+                raise
+        return jobs
+
+    async def heartbeat(self, worker: str, ids: list[int] | tuple[int, ...]) -> None:
+        """为仍在处理的任务续约"""
+        if not ids:
+            return
+        now = time()
+        async with self.lock:
+            await self.database.executemany(
+                "UPDATE jobs SET LEASE=?, UPDATED=? WHERE ID=? AND WORKER=? AND STATUS=?;",
+                [(now + self.lease, now, i, worker, self.RUNNING) for i in ids])
+
+    async def complete(self, worker: str, id_: int, success: bool) -> None:
+        """记录任务结果；租约已被其他进程接管时不做修改"""
+        async with self.lock:
+            await self.database.execute(
+                "UPDATE jobs SET STATUS=CASE WHEN ? THEN ? WHEN ATTEMPTS<? THEN ? ELSE ? END, "
+                "WORKER='', LEASE=0, UPDATED=? WHERE ID=? AND WORKER=? AND STATUS=?;",
+                (success, self.DONE, self.ATTEMPTS, self.QUEUED, self.FAILED, time(), id_, worker, self.RUNNING))
+
+    async def count(self) -> dict[str, int]:
+        async with self.database.execute("SELECT STATUS, COUNT(*) FROM jobs GROUP BY STATUS;") as cursor:
+            return {self.QUEUED: 0, self.RUNNING: 0, self.DONE: 0, self.FAILED: 0} | dict(
+                await cursor.fetchall())
+
+    async def __aenter__(self):
+        await self.__connect_database()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.database.close()
@@ -0,0 +1,77 @@
+from asyncio import Lock
+from asyncio import sleep
+from time import monotonic
+from urllib.parse import urlparse
+
+__all__ = ["TokenBucket", "RateLimiter", ]
+
+
+class TokenBucket:
+    """令牌桶限速器，请求成功时线性提高速率，请求失败时按比例降低速率（AIMD）"""
+    DECREASE = 0.5
+    COOLDOWN = 1
+
+    def __init__(self, rate: float, minimum: float, maximum: float, increase: float, burst: float = 1):
+        self.rate = rate
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.burst = burst
+        self.tokens = burst
+        self.updated = monotonic()
+        self.decreased = 0.0
+        self.lock = Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            self.__refill()
+            if self.tokens < 1:
+                await sleep((1 - self.tokens) / self.rate)
+                self.__refill()
+            self.tokens -= 1
+
+    def __refill(self) -> None:
+        now = monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def success(self) -> None:
+        self.rate = min(self.maximum, self.rate + self.increase)
+
+    def failure(self) -> None:
+        # 同一批并发请求的失败只降低一次速率
+        if (now := monotonic()) - self.decreased < self.COOLDOWN:
+            return
+        self.decreased = now
+        self.rate = max(self.minimum, self.rate * self.DECREASE)
+
+
+class RateLimiter:
+    """按请求类型（作品页面、图片 CDN、视频 CDN）分别限速"""
+    PAGE = "page"
+    IMAGE = "image"
+    VIDEO = "video"
+    # 初始速率、最低速率、最高速率、每次成功增加量，单位：次/秒
+    RATES = {
+        PAGE: (0.5, 0.05, 5, 0.1),
+        IMAGE: (10, 1, 100, 1),
+        VIDEO: (2, 0.2, 20, 0.5),
+    }
+
+    def __init__(self):
+        self.buckets = {k: TokenBucket(*v, burst=max(v[0], 1)) for k, v in self.RATES.items()}
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).hostname or ""
+        if host.endswith("xiaohongshu.com") and not host.startswith("ci."):
+            return self.buckets[self.PAGE]
+        return self.buckets[self.VIDEO if "video" in host else self.IMAGE]
+
+    async def acquire(self, url: str) -> None:
+        await self.bucket(url).acquire()
+
+    def success(self, url: str) -> None:
+        self.bucket(url).success()
+
+    def failure(self, url: str) -> None:
+        self.bucket(url).failure()
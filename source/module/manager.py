@@ -1,24 +1,41 @@
+from asyncio import get_running_loop
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
 from datetime import datetime
+from json import JSONDecodeError
+from json import dump
 from json import dumps
+from json import load
+from multiprocessing import get_context
 from pathlib import Path
 from re import compile
 from re import sub
-from shutil import move
 from shutil import rmtree
 
 from aiohttp import ClientSession
 from aiohttp import ClientTimeout
+from aiohttp import TCPConnector
+from aiohttp import TraceConfig
 
 from source.translator import Chinese
 from source.translator import English
+from .limiter import RateLimiter
+from .metrics import Metrics
+from .scheduler import Scheduler
 from .static import HEADERS
+from .store import MediaStore
+from .transcode import TRANSCODE
+from .transcode import transcode
 from .static import USERAGENT
+from .writer import Writer
 
 __all__ = ["Manager"]
 
 
 class Manager:
     NAME = compile(r"[^\u4e00-\u9fffa-zA-Z0-9！？，。；：“”（）《》]")
+    PARTIAL = ".partial"
+    STAGING = ".temp"
 
     def __init__(
             self,
@@ -34,12 +51,29 @@ class Manager:
             record_data: bool,
             image_format: str,
             folder_mode: bool,
+            download_limit: int,
+            host_limit: int,
+            writer_threads: int,
+            fsync: bool,
+            preallocate: bool,
+            media_store: bool,
+            metrics: bool,
+            connection_limit: int,
+            connection_host_limit: int,
+            dns_cache_ttl: int,
+            keepalive_timeout: int,
+            read_timeout: int,
+            total_timeout: int,
+            parse_processes: int,
+            image_transcode: bool,
+            keep_webp: bool,
             language: Chinese | English,
     ):
         self.root = root
         self.temp = root.joinpath("./temp")
         self.path = self.__check_path(path)
         self.folder = self.__check_folder(folder)
+        self.stagings: dict[Path, Path] = {}
         self.blank_headers = HEADERS | {
             "User-Agent": user_agent or USERAGENT, }
         self.headers = self.blank_headers | {"Cookie": cookie}
@@ -47,18 +81,80 @@ class Manager:
         self.chunk = chunk
         self.record_data = record_data
         self.image_format = self.__check_image_format(image_format)
+        # 启用本地转码时下载体积较小的 WebP 图片，下载完成后在本地转换为 PNG 图片
+        self.transcode = image_transcode and TRANSCODE and self.image_format == "png"
+        self.keep_webp = keep_webp
+        self.download_format = "webp" if self.transcode else self.image_format
         self.folder_mode = folder_mode
         self.proxy = proxy
+        self.metrics = Metrics(root.joinpath("metrics.prom") if metrics else None)
+        # 请求与下载共用同一个连接池，连接与 DNS 解析结果可在两者之间复用
+        self.connector = TCPConnector(
+            limit=connection_limit,
+            limit_per_host=connection_host_limit,
+            ttl_dns_cache=dns_cache_ttl or None,
+            keepalive_timeout=keepalive_timeout,
+        )
+        timeout = ClientTimeout(
+            total=total_timeout or None,
+            connect=timeout or None,
+            sock_read=read_timeout or None,
+        )
+        trace = self.__create_trace()
         self.request_session = ClientSession(
             headers=self.headers | {
                 "Referer": "https://www.xiaohongshu.com/explore", },
-            timeout=ClientTimeout(connect=timeout),
+            timeout=timeout,
+            connector=self.connector,
+            connector_owner=False,
+            trace_configs=[trace],
         )
         self.download_session = ClientSession(
             headers=self.blank_headers,
-            timeout=ClientTimeout(connect=timeout))
+            timeout=timeout,
+            connector=self.connector,
+            connector_owner=False,
+            trace_configs=[trace],
+        )
+        self.scheduler = Scheduler(download_limit, host_limit)
+        self.limiter = RateLimiter()
+        self.writer = Writer(writer_threads, fsync, preallocate)
+        self.store = MediaStore(self.folder) if media_store else None
+        # 页面解析使用的进程池，未启用时页面解析在事件循环中执行
+        self.processes = ProcessPoolExecutor(
+            max_workers=parse_processes,
+            mp_context=get_context("spawn"),
+        ) if parse_processes > 0 else None
+        # 图片转码使用独立的进程池，进程数量与 CPU 核心数量一致，不占用页面解析进程
+        self.transcoders = ProcessPoolExecutor(
+            mp_context=get_context("spawn"),
+        ) if self.transcode else None
         self.prompt = language
 
+    async def run_process(self, function, *args):
+        """在进程池中执行 function，function 与参数需要支持序列化；未启用进程池时在默认线程池中执行"""
+        return await get_running_loop().run_in_executor(self.processes, function, *args)
+
+    async def run_transcode(self, source: Path, target: Path, keep: bool) -> None:
+        """在图片转码进程池中将 WebP 图片转换为 PNG 图片"""
+        await get_running_loop().run_in_executor(self.transcoders, transcode, source, target, keep)
+
+    def __create_trace(self) -> TraceConfig:
+        """统计新建与复用的连接数量，用于确认 TLS 握手在大量请求之间被分摊"""
+        trace = TraceConfig()
+        trace.on_connection_create_end.append(self.__counter("connections_total", state="new"))
+        trace.on_connection_reuseconn.append(self.__counter("connections_total", state="reused"))
+        trace.on_connection_queued_start.append(self.__counter("connections_queued_total"))
+        trace.on_dns_cache_hit.append(self.__counter("dns_cache_total", result="hit"))
+        trace.on_dns_cache_miss.append(self.__counter("dns_cache_total", result="miss"))
+        return trace
+
+    def __counter(self, name: str, **labels):
+        async def count(session, context, params):
+            self.metrics.count(name, **labels)
+
+        return count
+
     def __check_path(self, path: str) -> Path:
         if not path:
             return self.root
@@ -97,12 +193,72 @@ class Manager:
     def archive(root: Path, name: str, folder_mode: bool) -> Path:
         return root.joinpath(name) if folder_mode else root
 
+    def staging(self, folder: Path) -> Path:
+        """返回与 folder 位于同一文件系统的暂存文件夹，下载完成后可直接重命名至 folder
+
+        优先使用作品文件储存文件夹下的隐藏文件夹；无法创建时使用程序根路径的 temp 文件夹。"""
+        # 暂存文件夹可能已被其他进程删除，使用缓存前确认仍然存在
+        if (staging := self.stagings.get(folder)) and staging.is_dir():
+            return staging
+        for staging in (
+                self.folder.joinpath(self.STAGING) if folder.is_relative_to(self.folder) else None,
+                folder.joinpath(self.STAGING),
+        ):
+            if staging and self.__create_staging(staging, folder):
+                break
+        else:
+            return self.temp
+        self.stagings[folder] = staging
+        return staging
+
     @staticmethod
-    def move(temp: Path, path: Path):
-        move(temp.resolve(), path.resolve())
+    def __create_staging(staging: Path, folder: Path) -> bool:
+        if not folder.is_dir():
+            return False
+        try:
+            staging.mkdir(exist_ok=True)
+            return staging.stat().st_dev == folder.stat().st_dev
+        except OSError:
+            return False
+
+    @classmethod
+    def __partial_file(cls, temp: Path) -> Path:
+        return temp.with_name(f"{temp.name}{cls.PARTIAL}")
+
+    def read_partial(self, temp: Path) -> dict:
+        try:
+            with self.__partial_file(temp).open("r", encoding="utf-8") as f:
+                return load(f)
+        except (OSError, JSONDecodeError):
+            return {}
+
+    def write_partial(self, temp: Path, data: dict):
+        with self.__partial_file(temp).open("w", encoding="utf-8") as f:
+            dump(data, f)
+
+    def delete_partial(self, temp: Path):
+        self.__partial_file(temp).unlink(missing_ok=True)
 
     def __clean(self):
-        rmtree(self.temp.resolve())
+        for staging in {self.temp, *self.stagings.values()}:
+            self.__clean_staging(staging)
+            # 作品文件储存文件夹下的暂存文件夹可能正被其他进程使用，不删除
+            if staging not in (self.temp, self.folder.joinpath(self.STAGING)):
+                with suppress(OSError):
+                    staging.rmdir()
+
+    def __clean_staging(self, staging: Path):
+        """保留可断点续传的部分数据及其记录文件，删除其余临时文件"""
+        if not staging.is_dir():
+            return
+        for file in staging.iterdir():
+            if file.is_dir():
+                rmtree(file)
+            elif file.name.endswith(self.PARTIAL):
+                if not file.with_name(file.name.removesuffix(self.PARTIAL)).is_file():
+                    file.unlink()
+            elif not self.__partial_file(file).is_file():
+                file.unlink()
 
     def filter_name(self, name: str) -> str:
         name = self.NAME.sub("_", name)
@@ -127,4 +283,10 @@ class Manager:
     async def close(self):
         await self.request_session.close()
         await self.download_session.close()
+        await self.connector.close()
+        self.writer.close()
+        if self.processes:
+            self.processes.shutdown(cancel_futures=True)
+        if self.transcoders:
+            self.transcoders.shutdown(cancel_futures=True)
         self.__clean()
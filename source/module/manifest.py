@@ -0,0 +1,83 @@
+from hashlib import sha1
+from pathlib import Path
+
+from aiosqlite import connect
+
+from source.module import Manager
+
+__all__ = ["Manifest"]
+
+
+class Manifest:
+    """已下载文件的校验信息，保存至数据库，以不含后缀的文件路径为键
+
+    记录服务器返回的 ETag、Last-Modified、Content-Length 与本地文件的大小、修改时间和哈希值；
+    再次运行时先校验本地文件，再向服务器确认文件是否更新，只重新下载不完整或已变化的文件。"""
+    BLOCK = 1024 * 1024
+
+    def __init__(self, manager: Manager):
+        self.file = manager.root.joinpath("XHS-Downloader.db")
+        self.database = None
+        self.entries: dict[str, dict] = {}
+
+    async def __connect_database(self):
+        self.database = await connect(self.file)
+        await self.database.execute("PRAGMA journal_mode=WAL;")
+        await self.database.execute("PRAGMA busy_timeout=30000;")
+        await self.database.execute(
+            "CREATE TABLE IF NOT EXISTS media_files (PATH TEXT PRIMARY KEY, URL TEXT, FILE TEXT, ETAG TEXT, "
+            "MODIFIED TEXT, LENGTH INTEGER, SIZE INTEGER, HASH TEXT, MTIME REAL);")
+        await self.database.commit()
+        async with self.database.execute(
+                "SELECT PATH, URL, FILE, ETAG, MODIFIED, LENGTH, SIZE, HASH, MTIME FROM media_files") as cursor:
+            self.entries = {i[0]: dict(zip(
+                ("url", "file", "etag", "modified", "length", "size", "hash", "mtime"), i[1:]))
+                for i in await cursor.fetchall()}
+
+    def get(self, path: Path, name: str) -> dict:
+        return self.entries.get(str(path.joinpath(name)), {})
+
+    async def set(self, path: Path, name: str, entry: dict) -> None:
+        self.entries[key := str(path.joinpath(name))] = entry
+        await self.database.execute(
+            "REPLACE INTO media_files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);",
+            (key, entry["url"], entry["file"], entry["etag"], entry["modified"], entry["length"], entry["size"],
+             entry["hash"], entry["mtime"],))
+        await self.database.commit()
+
+    def verify(self, path: Path, name: str) -> dict:
+        """本地文件完整时返回校验信息；没有记录、文件缺失、大小不符或内容已修改时返回空字典
+
+        修改时间未变化时只比较文件大小，否则重新计算哈希值。"""
+        if not (entry := self.get(path, name)):
+            return {}
+        try:
+            stat = path.joinpath(entry["file"]).stat()
+        except OSError:
+            return {}
+        if stat.st_size != entry["size"]:
+            return {}
+        if stat.st_mtime != entry["mtime"] and self.hash(path.joinpath(entry["file"])) != entry["hash"]:
+            return {}
+        return entry
+
+    @classmethod
+    def describe(cls, file: Path) -> dict:
+        """读取本地文件的名称、大小、修改时间和哈希值"""
+        stat = file.stat()
+        return {"file": file.name, "size": stat.st_size, "mtime": stat.st_mtime, "hash": cls.hash(file), }
+
+    @classmethod
+    def hash(cls, file: Path) -> str:
+        digest = sha1()
+        with file.open("rb") as f:
+            while block := f.read(cls.BLOCK):
+                digest.update(block)
+        return digest.hexdigest()
+
+    async def __aenter__(self):
+        await self.__connect_database()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.database.close()
@@ -0,0 +1,119 @@
+from asyncio import CancelledError
+from asyncio import Task
+from asyncio import create_task
+from asyncio import sleep
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import suppress
+from os import replace
+from pathlib import Path
+from time import perf_counter
+
+__all__ = ["Metrics", "Timer", ]
+
+
+class Metrics:
+    """记录各处理阶段的耗时分布、进行中数量、字节数与错误数
+
+    数据仅保存在内存中；设置 file 时每隔 INTERVAL 秒及退出时以 Prometheus 文本格式写入文件。"""
+    PREFIX = "xhs"
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+    INTERVAL = 15
+
+    def __init__(self, file: Path | None = None):
+        self.file = file
+        self.histograms: dict[str, list[int]] = {}
+        self.sums: defaultdict[str, float] = defaultdict(float)
+        self.in_flight: defaultdict[str, int] = defaultdict(int)
+        self.counters: defaultdict[str, defaultdict[tuple, float]] = defaultdict(lambda: defaultdict(float))
+        self.timer: Task | None = None
+
+    def measure(self, stage: str) -> "Timer":
+        """统计代码块耗时，可用于 with 与 async with 语句"""
+        return Timer(self, stage)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        if (counts := self.histograms.get(stage)) is None:
+            counts = self.histograms[stage] = [0] * (len(self.BUCKETS) + 1)
+        counts[bisect_left(self.BUCKETS, seconds)] += 1
+        self.sums[stage] += seconds
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        self.counters[name][tuple(labels.items())] += value
+
+    def error(self, stage: str, type_: str) -> None:
+        self.count("errors_total", stage=stage, type=type_)
+
+    def render(self) -> str:
+        lines = [
+            f"# TYPE {self.PREFIX}_stage_seconds histogram",
+        ]
+        for stage, counts in self.histograms.items():
+            total = 0
+            for bound, count in zip((*self.BUCKETS, "+Inf"), counts):
+                total += count
+                lines.append(f'{self.PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {total}')
+            lines.append(f'{self.PREFIX}_stage_seconds_sum{{stage="{stage}"}} {self.sums[stage]:.6f}')
+            lines.append(f'{self.PREFIX}_stage_seconds_count{{stage="{stage}"}} {total}')
+        lines.append(f"# TYPE {self.PREFIX}_in_flight gauge")
+        lines.extend(f'{self.PREFIX}_in_flight{{stage="{k}"}} {v}' for k, v in self.in_flight.items())
+        for name, values in self.counters.items():
+            lines.append(f"# TYPE {self.PREFIX}_{name} counter")
+            lines.extend(f"{self.PREFIX}_{name}{self.__format_labels(k)} {v:g}" for k, v in values.items())
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def __format_labels(labels: tuple) -> str:
+        return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+    def dump(self) -> None:
+        """先写入临时文件再替换，读取方不会读到写入一半的内容"""
+        if not self.file:
+            return
+        temp = self.file.with_name(f"{self.file.name}.tmp")
+        temp.write_text(self.render(), encoding="utf-8")
+        replace(temp, self.file)
+
+    async def __timing_dump(self):
+        while True:
+            await sleep(self.INTERVAL)
+            self.dump()
+
+    async def __aenter__(self):
+        if self.file:
+            self.timer = create_task(self.__timing_dump())
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if self.timer:
+            self.timer.cancel()
+            with suppress(CancelledError):
+                await self.timer
+            self.timer = None
+        self.dump()
+
+
+class Timer:
+    """记录代码块耗时与进行中数量；代码块抛出异常时按异常类型记录错误"""
+
+    def __init__(self, metrics: Metrics, stage: str):
+        self.metrics = metrics
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        self.metrics.in_flight[self.stage] += 1
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.in_flight[self.stage] -= 1
+        self.metrics.observe(self.stage, perf_counter() - self.start)
+        if exc_type and issubclass(exc_type, Exception):
+            self.metrics.error(self.stage, exc_type.__name__)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.__exit__(exc_type, exc_value, traceback)
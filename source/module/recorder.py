@@ -1,46 +1,168 @@
+from asyncio import CancelledError
+from asyncio import Lock
+from asyncio import Task
+from asyncio import create_task
+from asyncio import sleep
+from contextlib import suppress
+from time import time
+
 from aiosqlite import connect
 
 from source.module import Manager
+from .static import ERROR
+from .tools import logging
 
 __all__ = ["IDRecorder"]
 
 
 class IDRecorder:
+    """作品下载记录
+
+    启动时将全部作品 ID 载入内存，查询不访问数据库；
+    写入操作先缓存在内存中，达到 BATCH 条或每隔 INTERVAL 秒批量提交一次，退出时提交剩余数据。
+    多个进程共用数据库时设置 shared，内存中不存在的作品 ID 会再次查询数据库，写入操作立即提交。
+    提交失败的记录放回缓存，下次提交时重试。
+
+    shared 模式下下载作品前调用 acquire 在 downloading 表中占用作品 ID，同一作品同时只由一个进程下载；
+    占用记录每隔 INTERVAL 秒续约，进程异常退出后超过 LEASE 秒失效。"""
+    BATCH = 256
+    INTERVAL = 5
+    LEASE = 60
+    POLL = 1
+
     def __init__(self, manager: Manager):
         self.file = manager.root.joinpath("XHS-Downloader.db")
         self.database = None
         self.cursor = None
+        self.ids: set[str] = set()
+        self.pending: dict[str, bool] = {}
+        self.timer: Task | None = None
+        self.shared = False
+        self.lock = Lock()
+        self.held: set[str] = set()
 
     async def __connect_database(self):
         self.database = await connect(self.file)
         self.cursor = await self.database.cursor()
+        await self.database.execute("PRAGMA journal_mode=WAL;")
+        await self.database.execute("PRAGMA synchronous=NORMAL;")
+        await self.database.execute("PRAGMA busy_timeout=30000;")
         await self.database.execute("CREATE TABLE IF NOT EXISTS explore_ids (ID TEXT PRIMARY KEY);")
+        await self.database.execute("CREATE TABLE IF NOT EXISTS downloading (ID TEXT PRIMARY KEY, LEASE REAL);")
         await self.database.commit()
+        await self.__load()
+        self.timer = create_task(self.__timing_flush())
+
+    async def __load(self):
+        await self.cursor.execute("SELECT ID FROM explore_ids")
+        self.ids = {i[0] for i in await self.cursor.fetchall()}
 
     async def select(self, id_: str):
-        await self.cursor.execute("SELECT ID FROM explore_ids WHERE ID=?", (id_,))
-        return await self.cursor.fetchone()
+        if id_ in self.ids:
+            return (id_,)
+        if not self.shared:
+            return None
+        async with self.database.execute("SELECT ID FROM explore_ids WHERE ID=?", (id_,)) as cursor:
+            if result := await cursor.fetchone():
+                self.ids.add(id_)
+            return result
 
     async def add(self, id_: str) -> None:
-        await self.database.execute("REPLACE INTO explore_ids VALUES (?);", (id_,))
-        await self.database.commit()
+        self.ids.add(id_)
+        self.pending[id_] = True
+        await self.__check_flush()
 
     async def delete(self, id_: str) -> None:
-        if id_:
-            await self.database.execute("DELETE FROM explore_ids WHERE ID=?", (id_,))
-            await self.database.commit()
+        await self.delete_many((id_,))
 
     async def delete_many(self, ids: list | tuple):
-        [await self.delete(i) for i in ids]
+        for i in ids:
+            if i:
+                self.ids.discard(i)
+                self.pending[i] = False
+        await self.__check_flush()
+
+    async def acquire(self, id_: str) -> None:
+        """占用作品 ID，其他进程正在下载该作品时等待其结束或占用记录失效；非 shared 模式不做处理"""
+        if not self.shared:
+            return
+        while True:
+            async with self.lock:
+                now = time()
+                await self.database.execute("DELETE FROM downloading WHERE ID=? AND LEASE<?;", (id_, now))
+                async with self.database.execute(
+                        "INSERT OR IGNORE INTO downloading VALUES (?, ?);", (id_, now + self.LEASE)) as cursor:
+                    acquired = cursor.rowcount
+                await self.database.commit()
+            if acquired:
+                self.held.add(id_)
+                return
+            await sleep(self.POLL)
+
+    async def release(self, id_: str) -> None:
+        if id_ not in self.held:
+            return
+        self.held.discard(id_)
+        async with self.lock:
+            await self.database.execute("DELETE FROM downloading WHERE ID=?;", (id_,))
+            await self.database.commit()
+
+    async def __renew(self):
+        if not self.held:
+            return
+        async with self.lock:
+            await self.database.executemany(
+                "UPDATE downloading SET LEASE=? WHERE ID=?;", [(time() + self.LEASE, i) for i in self.held])
+            await self.database.commit()
 
     async def all(self):
-        await self.cursor.execute("SELECT ID FROM explore_ids")
-        return [i[0] for i in await self.cursor.fetchmany()]
+        return list(self.ids)
+
+    async def __check_flush(self):
+        if self.shared or len(self.pending) >= self.BATCH:
+            await self.flush()
+
+    async def __timing_flush(self):
+        while True:
+            await sleep(self.INTERVAL)
+            try:
+                await self.flush()
+                await self.__renew()
+            except Exception as error:
+                logging(None, str(error), ERROR)
+
+    async def flush(self):
+        async with self.lock:
+            if not self.pending:
+                return
+            pending, self.pending = self.pending, {}
+            try:
+                await self.database.executemany(
+                    "REPLACE INTO explore_ids VALUES (?);", [(k,) for k, v in pending.items() if v])
+                await self.database.executemany(
+                    "DELETE FROM explore_ids WHERE ID=?", [(k,) for k, v in pending.items() if not v])
+                await self.database.commit()
+            except BaseException:
+                with suppress(Exception):
+                    await self.database.rollback()
+                # 提交期间产生的新操作优先于放回的记录
+                self.pending = pending | self.pending
+                raise
 
     async def __aenter__(self):
         await self.__connect_database()
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
-        await self.cursor.close()
-        await self.database.close()
+        if self.timer:
+            self.timer.cancel()
+            with suppress(CancelledError):
+                await self.timer
+            self.timer = None
+        try:
+            await self.flush()
+            for i in tuple(self.held):
+                await self.release(i)
+        finally:
+            await self.cursor.close()
+            await self.database.close()
@@ -0,0 +1,78 @@
+from asyncio import CancelledError
+from asyncio import Future
+from asyncio import get_running_loop
+from collections import defaultdict
+from collections import deque
+from contextlib import asynccontextmanager
+from contextlib import suppress
+from urllib.parse import urlparse
+
+__all__ = ["Scheduler"]
+
+
+class Scheduler:
+    """下载调度器，限制全局与单个域名的同时下载数量，按请求顺序分配下载名额"""
+
+    def __init__(self, limit: int, host_limit: int):
+        self.limit = max(limit, 1)
+        self.host_limit = max(host_limit, 1)
+        self.active = 0
+        self.hosts: defaultdict[str, int] = defaultdict(int)
+        self.waiters: deque[tuple[str, Future]] = deque()
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = urlparse(url).hostname or ""
+        await self.__acquire(host)
+        try:
+            yield
+        finally:
+            self.__release(host)
+
+    async def __acquire(self, host: str) -> None:
+        future = get_running_loop().create_future()
+        self.waiters.append((host, future))
+        self.__dispatch()
+        try:
+            await future
+        except CancelledError:
+            if future.done() and not future.cancelled():
+                self.__release(host)
+            else:
+                self.__remove(host, future)
+            raise
+
+    def __release(self, host: str) -> None:
+        self.active -= 1
+        self.hosts[host] -= 1
+        if not self.hosts[host]:
+            del self.hosts[host]
+        self.__dispatch()
+
+    def __dispatch(self) -> None:
+        """按排队顺序唤醒等待者；域名名额已满的等待者不会阻塞其他域名"""
+        for item in list(self.waiters):
+            if self.active >= self.limit:
+                break
+            host, future = item
+            if future.done():
+                self.waiters.remove(item)
+            elif self.__available(host):
+                self.waiters.remove(item)
+                self.__occupy(host)
+                future.set_result(None)
+
+    def __available(self, host: str) -> bool:
+        return self.active < self.limit and self.hosts.get(host, 0) < self.host_limit
+
+    def __occupy(self, host: str) -> None:
+        self.active += 1
+        self.hosts[host] += 1
+
+    def __remove(self, host: str, future: Future) -> None:
+        with suppress(ValueError):
+            self.waiters.remove((host, future))
+
+    @property
+    def pending(self) -> int:
+        return len(self.waiters)
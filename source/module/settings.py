@@ -20,7 +20,32 @@ class Settings:
         "image_format": "PNG",
         "folder_mode": False,
         "language": "zh-CN",
-        # "server": False,
+        "concurrency": 1,
+        "download_limit": 8,
+        "host_limit": 4,
+        "link_cache_ttl": 604800,
+        "page_cache": False,
+        "page_cache_size": 512,
+        "page_cache_ttl": 86400,
+        "offline": False,
+        "writer_threads": 4,
+        "fsync": False,
+        "preallocate": False,
+        "media_store": False,
+        "metrics": False,
+        "connection_limit": 100,
+        "connection_host_limit": 0,
+        "dns_cache_ttl": 300,
+        "keepalive_timeout": 30,
+        "read_timeout": 0,
+        "total_timeout": 0,
+        "server": False,
+        "server_host": "127.0.0.1",
+        "server_port": 5556,
+        "parse_processes": 0,
+        "image_transcode": False,
+        "keep_webp": False,
+        "validate_files": False,
     }
     encode = "UTF-8-SIG" if system() == "Windows" else "UTF-8"
 
@@ -32,7 +57,7 @@ class Settings:
 
     def read(self) -> dict:
         with self.file.open("r", encoding=self.encode) as f:
-            return load(f)
+            return self.default | load(f)
 
     def create(self) -> dict:
         with self.file.open("w", encoding=self.encode) as f:
@@ -0,0 +1,55 @@
+from hashlib import sha1
+from os import link
+from os import scandir
+from pathlib import Path
+from shutil import copy2
+from urllib.parse import urlparse
+
+__all__ = ["MediaStore"]
+
+
+class MediaStore:
+    """以 CDN 文件标识为键的作品文件仓库，相同文件只下载一次，作品文件夹中使用硬链接指向仓库文件"""
+    FOLDER = ".store"
+
+    def __init__(self, root: Path):
+        self.folder = root.joinpath(self.FOLDER)
+        self.folder.mkdir(exist_ok=True)
+        self.files: dict[str, str] | None = None
+
+    @staticmethod
+    def key(url: str, format_: str) -> str:
+        """图片与视频链接的路径即为 CDN 文件标识，同一标识的不同格式分别储存"""
+        return sha1(f"{urlparse(url).path}|{format_}".encode()).hexdigest()
+
+    def get(self, key: str) -> Path | None:
+        if self.files is None:
+            self.files = self.__scan()
+        return self.folder.joinpath(name) if (name := self.files.get(key)) else None
+
+    def __scan(self) -> dict[str, str]:
+        with scandir(self.folder) as entries:
+            return {i.name.split(".")[0]: i.name for i in entries if i.is_file()}
+
+    def add(self, key: str, file: Path) -> None:
+        """将已下载的文件加入仓库，仓库中已存在相同文件时不做处理"""
+        if self.get(key):
+            return
+        self.__link(file, target := self.folder.joinpath(f"{key}{file.suffix}"))
+        self.files[key] = target.name
+
+    def restore(self, key: str, path: Path, name: str) -> Path | None:
+        """在作品文件夹中创建指向仓库文件的链接，返回链接路径"""
+        if not (source := self.get(key)):
+            return None
+        self.__link(source, target := path.joinpath(f"{name}{source.suffix}"))
+        return target
+
+    @staticmethod
+    def __link(source: Path, target: Path) -> None:
+        try:
+            link(source, target)
+        except FileExistsError:
+            pass
+        except OSError:
+            copy2(source, target)
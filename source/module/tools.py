@@ -1,23 +1,152 @@
 from asyncio import sleep
-from random import randint
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from functools import wraps
+from inspect import signature
+from random import uniform
+from time import monotonic
+from time import time
+from urllib.parse import urlparse
 
 from rich.text import Text
 
 from .static import INFO
+from .static import WARNING
 
-__all__ = ["retry", "logging", "wait"]
+__all__ = [
+    "retry",
+    "logging",
+    "Outcome",
+    "Fatal",
+    "Transient",
+    "Throttled",
+    "classify_status",
+    "classify_error",
+    "CircuitBreaker",
+]
 
 
-def retry(function):
-    async def inner(self, *args, **kwargs):
-        if result := await function(self, *args, **kwargs):
+class Outcome(Exception):
+    """请求失败的类型，由 retry 决定是否重试以及重试前的等待时间"""
+
+    def __init__(self, retry_after: float = 0):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+class Fatal(Outcome):
+    """重试无意义的失败，例如 404"""
+
+
+class Transient(Outcome):
+    """连接重置等偶发失败，立即重试"""
+
+
+class Throttled(Outcome):
+    """服务器过载、限流或超时，指数退避后重试"""
+
+
+def classify_status(status: int, headers=None) -> Outcome:
+    if status in {408, 429} or status >= 500 or status == 403:
+        return Throttled(parse_retry_after((headers or {}).get("Retry-After", "")))
+    return Fatal()
+
+
+def classify_error(error: Exception) -> Outcome:
+    return Throttled() if isinstance(error, TimeoutError) else Transient()
+
+
+def parse_retry_after(value: str) -> float:
+    if not value:
+        return 0
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time(), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class CircuitBreaker:
+    """按域名统计连续失败次数，达到 THRESHOLD 次后 COOLDOWN 秒内直接返回失败；
+    冷却结束后仅放行一次试探请求，成功则恢复，失败则继续冷却"""
+    THRESHOLD = 5
+    COOLDOWN = 30
+
+    def __init__(self):
+        self.failures: defaultdict[str, int] = defaultdict(int)
+        self.opened: dict[str, float] = {}
+
+    def allow(self, host: str) -> bool:
+        if (opened := self.opened.get(host)) is None:
+            return True
+        if monotonic() - opened < self.COOLDOWN:
+            return False
+        self.opened[host] = monotonic()
+        return True
+
+    def success(self, host: str) -> None:
+        self.failures.pop(host, None)
+        self.opened.pop(host, None)
+
+    def failure(self, host: str) -> None:
+        self.failures[host] += 1
+        if self.failures[host] >= self.THRESHOLD:
+            self.opened[host] = monotonic()
+
+
+BREAKER = CircuitBreaker()
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+RETRY_AFTER_MAX = 300
+
+
+def retry(function=None, *, default=None):
+    """重试装饰器，被装饰方法的第一个参数为请求链接，重试次数为 self.retry
+
+    Fatal 不重试；Transient 首次立即重试，之后指数退避；Throttled 指数退避并遵循 Retry-After；
+    返回值为假时立即重试；域名熔断期间记录日志后直接返回 default，日志写入被装饰方法的 log 参数。"""
+
+    def decorator(function):
+        parameters = signature(function)
+
+        @wraps(function)
+        async def inner(self, url: str, *args, **kwargs):
+            host = urlparse(url).hostname or ""
+            result = default
+            for attempt in range(self.retry + 1):
+                if not BREAKER.allow(host):
+                    log = parameters.bind_partial(self, url, *args, **kwargs).arguments.get("log")
+                    logging(log, self.prompt.circuit_open(host), WARNING)
+                    return default
+                delay = 0
+                try:
+                    result = await function(self, url, *args, **kwargs)
+                except Fatal:
+                    return default
+                except Transient:
+                    BREAKER.failure(host)
+                    result = default
+                    delay = backoff(attempt - 1) if attempt else 0
+                except Throttled as outcome:
+                    BREAKER.failure(host)
+                    result = default
+                    delay = max(min(outcome.retry_after, RETRY_AFTER_MAX), backoff(attempt))
+                else:
+                    BREAKER.success(host)
+                    if result:
+                        return result
+                if attempt < self.retry and delay:
+                    await sleep(delay)
             return result
-        for _ in range(self.retry):
-            if result := await function(self, *args, **kwargs):
-                return result
-        return result
 
-    return inner
+        return inner
+
+    return decorator(function) if function else decorator
+
+
+def backoff(attempt: int) -> float:
+    return uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
 
 
 def logging(log, text, style=INFO):
@@ -26,7 +155,3 @@ def logging(log, text, style=INFO):
         log.write(string)
     else:
         print(string)
-
-
-async def wait():
-    await sleep(randint(15, 45) * 0.1)
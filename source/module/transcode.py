@@ -0,0 +1,22 @@
+from os import replace
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+__all__ = ["transcode", "TRANSCODE", ]
+
+# 本地转码依赖 Pillow，未安装时使用服务器转码的 PNG 图片
+TRANSCODE = Image is not None
+
+
+def transcode(source: Path, target: Path, keep: bool) -> None:
+    """将 WebP 图片转换为 PNG 图片，keep 为假时删除 WebP 图片；可在子进程中执行"""
+    temp = target.with_name(f"{target.name}.tmp")
+    with Image.open(source) as image:
+        image.save(temp, format="PNG")
+    replace(temp, target)
+    if not keep:
+        source.unlink()
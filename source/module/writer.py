@@ -0,0 +1,117 @@
+from asyncio import Queue
+from asyncio import create_task
+from asyncio import get_running_loop
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from errno import EXDEV
+from os import fsync
+from os import replace
+from pathlib import Path
+from shutil import move
+
+try:
+    from os import posix_fallocate
+except ImportError:
+    posix_fallocate = None
+
+__all__ = ["Writer"]
+
+
+class Writer:
+    """在线程池中执行文件写入、同步与移动操作，避免磁盘读写阻塞事件循环"""
+    DEPTH = 4
+
+    def __init__(self, threads: int, sync: bool, preallocate: bool):
+        self.executor = ThreadPoolExecutor(max_workers=max(threads, 1), thread_name_prefix="XHS-Writer")
+        self.sync = sync
+        self.preallocate = preallocate
+
+    async def run(self, function, *args, **kwargs):
+        return await get_running_loop().run_in_executor(self.executor, partial(function, *args, **kwargs))
+
+    @asynccontextmanager
+    async def open(self, path: Path, mode: str, size: int = 0):
+        """打开文件写入流；size 大于 0 时预先分配磁盘空间，关闭时截断至实际写入长度"""
+        file = await self.run(path.open, mode)
+        stream = WriteStream(self, file)
+        try:
+            if size:
+                await self.run(self.__allocate, file, size)
+            yield stream
+        finally:
+            try:
+                await stream.close()
+            finally:
+                await self.run(self.__close, file, stream.written if size else -1)
+
+    @staticmethod
+    def __allocate(file, size: int):
+        if posix_fallocate:
+            try:
+                posix_fallocate(file.fileno(), 0, size)
+                return
+            except OSError:
+                pass
+        file.truncate(size)
+
+    def __close(self, file, size: int):
+        try:
+            if size >= 0:
+                file.truncate(size)
+            if self.sync:
+                file.flush()
+                fsync(file.fileno())
+        finally:
+            file.close()
+
+    async def move(self, temp: Path, path: Path) -> bool:
+        """同一文件系统内直接重命名；跨文件系统时复制文件，返回是否发生复制"""
+        return await self.run(self.__move, temp.resolve(), path.resolve())
+
+    @staticmethod
+    def __move(temp: Path, path: Path) -> bool:
+        try:
+            replace(temp, path)
+            return False
+        except OSError as error:
+            if error.errno != EXDEV:
+                raise
+        move(temp, path)
+        return True
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class WriteStream:
+    """按顺序写入数据块；等待写入的数据块达到 Writer.DEPTH 个时暂停读取网络数据"""
+
+    def __init__(self, writer: Writer, file):
+        self.writer = writer
+        self.file = file
+        self.queue = Queue(maxsize=writer.DEPTH)
+        self.written = 0
+        self.error: OSError | None = None
+        self.task = create_task(self.__consume())
+
+    async def write(self, chunk: bytes):
+        if self.error:
+            raise self.error
+        await self.queue.put(chunk)
+
+    async def __consume(self):
+        while (chunk := await self.queue.get()) is not None:
+            if self.error:
+                continue
+            try:
+                await self.writer.run(self.file.write, chunk)
+                self.written += len(chunk)
+            except OSError as error:
+                self.error = error
+
+    async def close(self):
+        await self.queue.put(None)
+        await self.task
+        if self.error:
+            raise self.error
@@ -22,6 +22,10 @@ class Chinese:
     )
 
     download_link_error: str = "提取作品文件下载地址失败！"
+    transcode_unavailable: str = "未安装 Pillow，无法在本地转换图片格式，将下载服务器转换的 PNG 图片！"
+    server_invalid_json: str = "请求内容不是合法的 JSON"
+    server_invalid_urls: str = "urls 必须是作品链接字符串或字符串列表"
+    server_job_not_found: str = "任务不存在"
     extract_link_failure: str = "提取小红书作品链接失败！"
     invalid_link: str = "未输入任何小红书作品链接！"
     download_failure: str = "下载小红书作品文件失败！"
@@ -52,6 +56,7 @@ class Chinese:
     timeout: str = "请求超时限制："
     chunk: str = "下载数据块大小："
     max_retry: str = "最大重试次数："
+    concurrency: str = "同时处理作品数量："
     record_data: str = "记录作品数据"
     image_format: str = "图片下载格式"
     folder_mode: str = "文件夹归档模式"
@@ -122,3 +127,35 @@ class Chinese:
     @staticmethod
     def exist_record(id_: str) -> str:
         return f"作品 {id_} 存在下载记录，跳过下载！"
+
+    @staticmethod
+    def batch_summary(total: int, success: int, failure: int, time: float) -> str:
+        return f"批量处理完成：共 {total} 个作品，成功 {success} 个，失败 {failure} 个，耗时 {time:.1f} 秒"
+
+    @staticmethod
+    def cross_device_copy(name: str, size: int) -> str:
+        return f"{name} 暂存文件夹与保存文件夹不在同一文件系统，额外复制 {size / 1024 / 1024:.2f} MB 数据"
+
+    @staticmethod
+    def store_link(name: str) -> str:
+        return f"{name} 文件已下载过，已从文件仓库创建链接！"
+
+    @staticmethod
+    def circuit_open(host: str) -> str:
+        return f"{host} 连续请求失败次数过多，暂停期间跳过请求！"
+
+    @staticmethod
+    def transcode_error(name: str) -> str:
+        return f"{name} 转换为 PNG 格式失败，已保留 WebP 格式文件！"
+
+    @staticmethod
+    def file_changed(name: str) -> str:
+        return f"{name} 文件不完整或服务器文件已更新，重新下载！"
+
+    @staticmethod
+    def jobs_queued(count: int) -> str:
+        return f"已将 {count} 个作品加入任务队列"
+
+    @staticmethod
+    def server_start(host: str, port: int) -> str:
+        return f"API 服务已启动：http://{host}:{port}"
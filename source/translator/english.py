@@ -38,6 +38,10 @@ class English(Chinese):
     )
 
     download_link_error: str = "Failed to extract the download address for the Xiaohongshu works files!"
+    transcode_unavailable: str = "Pillow is not installed, images cannot be converted locally, downloading PNG images converted by the server!"
+    server_invalid_json: str = "The request body is not valid JSON"
+    server_invalid_urls: str = "urls must be a string of works links or a list of strings"
+    server_job_not_found: str = "Job not found"
     extract_link_failure: str = "Failed to extract the links for Xiaohongshu works!"
     invalid_link: str = "No Xiaohongshu works links provided!"
     download_failure: str = "Failed to download the Xiaohongshu works files!"
@@ -70,6 +74,7 @@ class English(Chinese):
     timeout: str = "Request timeout limit:"
     chunk: str = "Download data block size:"
     max_retry: str = "Maximum retry attempts:"
+    concurrency: str = "Concurrent works:"
     record_data: str = "Record works data"
     image_format: str = "Image download format"
     folder_mode: str = "Folder archiving mode"
@@ -145,3 +150,35 @@ class English(Chinese):
     @staticmethod
     def exist_record(id_: str) -> str:
         return f"works {id_} has a download record, skipping download!"
+
+    @staticmethod
+    def batch_summary(total: int, success: int, failure: int, time: float) -> str:
+        return f"Batch completed: {total} works, {success} succeeded, {failure} failed, {time:.1f} seconds elapsed"
+
+    @staticmethod
+    def cross_device_copy(name: str, size: int) -> str:
+        return f"{name} was staged on a different file system, {size / 1024 / 1024:.2f} MB had to be copied"
+
+    @staticmethod
+    def store_link(name: str) -> str:
+        return f"{name} was downloaded before, linked from the media store!"
+
+    @staticmethod
+    def circuit_open(host: str) -> str:
+        return f"Too many consecutive failures for {host}, skipping requests while it is paused!"
+
+    @staticmethod
+    def transcode_error(name: str) -> str:
+        return f"Failed to convert {name} to PNG, the WebP file is kept!"
+
+    @staticmethod
+    def file_changed(name: str) -> str:
+        return f"{name} is incomplete or has changed on the server, downloading again!"
+
+    @staticmethod
+    def jobs_queued(count: int) -> str:
+        return f"{count} works added to the job queue"
+
+    @staticmethod
+    def server_start(host: str, port: int) -> str:
+        return f"API server started: http://{host}:{port}"